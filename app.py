@@ -1,12 +1,20 @@
+import logging
 import sys
+import time
+from multiprocessing import freeze_support
 
-from PyQt5.QtGui import QIcon
+# Startup time is measured from here, so it includes the heavy imports below
+STARTUP_STARTED_AT = time.perf_counter()
+
+from PyQt5.QtGui import QCloseEvent, QIcon, QPaintEvent
 from PyQt5.QtWidgets import QApplication, QMainWindow
 
 from mvc import MainController, MainModel, MainView
 from resources import resources_rc
 from ui.mainUI import Ui_MainWindow
 
+logger = logging.getLogger(__name__)
+
 
 class MyWindow(QMainWindow):
     """The main window of the application.
@@ -24,6 +32,7 @@ class MyWindow(QMainWindow):
         and MainController to establish the application's core architecture.
         """
         super().__init__()
+        self._is_first_paint_logged: bool = False
 
         self.main_ui: Ui_MainWindow = Ui_MainWindow()
         self.main_ui.setupUi(self)
@@ -39,8 +48,31 @@ class MyWindow(QMainWindow):
             model=self.main_model, view=self.main_view
         )
 
+    def paintEvent(self, event: QPaintEvent) -> None:
+        """Paints the window and logs the time from startup to the first paint.
+
+        Args:
+            event: The paint event.
+        """
+        super().paintEvent(event)
+        if not self._is_first_paint_logged:
+            self._is_first_paint_logged = True
+            logger.info("Time to first paint: %.2f s", time.perf_counter() - STARTUP_STARTED_AT)
+
+    def closeEvent(self, event: QCloseEvent) -> None:
+        """Stops background work and closes the local caches when the window closes.
+
+        Args:
+            event: The close event.
+        """
+        self.main_model.shutdown()
+        super().closeEvent(event)
+
 
 if __name__ == "__main__":
+    # Required for the workbook parsing process pool in frozen builds
+    freeze_support()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
     app: QApplication = QApplication(sys.argv)
     application: MyWindow = MyWindow()
     application.show()
@@ -0,0 +1,112 @@
+"""Benchmarks the columnar materials aggregation against the per-row loop.
+
+Usage (from the project root):
+    python -m benchmarks.aggregation --files 60 --rows 2000
+"""
+
+import argparse
+import math
+import random
+import time
+from typing import Dict, List
+
+from utils.materials import NOM_KEY, QTY_KEY, RMP_KEY, UNIT_KEY
+from utils.materials import aggregate_materials, build_materials_frame, materials_to_records
+from utils.spec_readers import SpecRow
+
+
+def generate_rows(files: int, rows: int, seed: int = 0) -> List[List[SpecRow]]:
+    """Creates synthetic specification rows for a product.
+
+    Every file also references the next semi-finished product, as real
+    specifications do, so that the semi-finished filter has work to do.
+
+    Args:
+        files: Number of specification files.
+        rows: Material rows per file.
+        seed: Random seed, so repeated runs produce the same data.
+
+    Returns:
+        Normalized rows of each file.
+    """
+    generator = random.Random(seed)
+    materials = [f"Материал {index}" for index in range(20000)]
+    units = ["шт", "кг", "м", "л"]
+
+    rows_per_file: List[List[SpecRow]] = []
+    for file_index in range(files):
+        is_rmp = file_index % 10 == 0
+        file_rows = [
+            (generator.choice(materials), float(generator.randint(1, 50000)), generator.choice(units), is_rmp)
+            for _ in range(rows)
+        ]
+        file_rows.append((f"ПФ {file_index + 1}", 1000.0, "шт", is_rmp))
+        rows_per_file.append(file_rows)
+    return rows_per_file
+
+
+def aggregate_with_loop(rows_per_file: List[List[SpecRow]], semi_product_names: List[str]) -> List[Dict]:
+    """The previous row-by-row aggregation, kept as the benchmark baseline."""
+    product_materials_dict: Dict[str, Dict] = {}
+    for rows in rows_per_file:
+        for nomenclature, quantity, unit, is_rmp in rows:
+            if nomenclature.lower().strip() in semi_product_names:
+                continue
+
+            quantity = quantity / 1000
+            if nomenclature in product_materials_dict:
+                product_materials_dict[nomenclature][QTY_KEY] += quantity
+            else:
+                product_materials_dict[nomenclature] = {
+                    NOM_KEY: nomenclature,
+                    QTY_KEY: quantity,
+                    UNIT_KEY: unit,
+                    RMP_KEY: is_rmp,
+                }
+    return list(product_materials_dict.values())
+
+
+def aggregate_vectorized(rows_per_file: List[List[SpecRow]], semi_product_names: List[str]) -> List[Dict]:
+    """The columnar aggregation used by ``MainModel._aggregate_product_materials``."""
+    return materials_to_records(aggregate_materials(build_materials_frame(rows_per_file), semi_product_names))
+
+
+def is_same_result(expected: List[Dict], actual: List[Dict]) -> bool:
+    """Compares two aggregates, allowing for floating point summation order."""
+    if len(expected) != len(actual):
+        return False
+    for left, right in zip(expected, actual):
+        if (left[NOM_KEY], left[UNIT_KEY], left[RMP_KEY]) != (right[NOM_KEY], right[UNIT_KEY], right[RMP_KEY]):
+            return False
+        if not math.isclose(left[QTY_KEY], right[QTY_KEY], rel_tol=1e-9):
+            return False
+    return True
+
+
+def main() -> None:
+    """Runs the benchmark and prints the results."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=60, help="number of specification files")
+    parser.add_argument("--rows", type=int, default=2000, help="material rows per file")
+    parser.add_argument("--repeat", type=int, default=5, help="timed passes per implementation")
+    args = parser.parse_args()
+
+    rows_per_file = generate_rows(args.files, args.rows)
+    semi_product_names = [f"пф {index}" for index in range(args.files)]
+    total_rows = sum(len(rows) for rows in rows_per_file)
+
+    print(f"{args.files} files, {total_rows} rows, best of {args.repeat}")
+    results = {}
+    for name, aggregate in (("loop", aggregate_with_loop), ("vectorized", aggregate_vectorized)):
+        best = float("inf")
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            results[name] = aggregate(rows_per_file, semi_product_names)
+            best = min(best, time.perf_counter() - started)
+        print(f"{name:<12} {best:>8.3f} s {total_rows / best:>12.0f} rows/s")
+
+    print(f"identical: {is_same_result(results['loop'], results['vectorized'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""Benchmarks the products catalog scan with different numbers of workers.
+
+Every run builds the catalog index from scratch, as on the first launch,
+and then revalidates it unchanged, as on every later launch.
+
+Usage (from the project root):
+    python -m benchmarks.catalog_scan --folder "//server/products" --workers 1 4 8 16 32
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from classes.catalog_index import CatalogIndex
+
+
+def main() -> None:
+    """Parses command line arguments and runs the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--folder", required=True, help="products folder to scan")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8, 16], help="worker counts to compare")
+    args = parser.parse_args()
+
+    print(f"{'workers':>8} {'full scan, s':>14} {'revalidation, s':>16} {'products':>10}")
+    with tempfile.TemporaryDirectory() as folder:
+        for workers in args.workers:
+            index_path = os.path.join(folder, f"catalog_{workers}.json")
+
+            started = time.perf_counter()
+            index = CatalogIndex(index_path, args.folder, scan_workers=workers)
+            index.refresh()
+            full_scan = time.perf_counter() - started
+
+            started = time.perf_counter()
+            index = CatalogIndex(index_path, args.folder, scan_workers=workers)
+            index.refresh()
+            revalidation = time.perf_counter() - started
+
+            print(f"{workers:>8} {full_scan:>14.3f} {revalidation:>16.3f} {len(index.get_products()):>10}")
+
+
+if __name__ == "__main__":
+    main()
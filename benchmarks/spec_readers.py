@@ -0,0 +1,204 @@
+"""Benchmarks every available specification reader backend.
+
+Each backend reads the same set of workbooks in a separate process, and the
+report shows the read speed and the peak resident memory of that process.
+
+Usage (from the project root):
+    python -m benchmarks.spec_readers --files 20 --rows 2000
+    python -m benchmarks.spec_readers --folder "//server/products/БКН.0.12"
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+from openpyxl import Workbook
+
+from utils.spec_readers import SPEC_READERS, SPEC_SHEET_NAME, read_specification
+
+# Headers of a typical exported specification; only three of them are used
+HEADERS = [
+    "№",
+    "Артикул",
+    "Номенклатура",
+    "Характеристика",
+    "Количество на единицу",
+    "Ед. изм.",
+    "Склад",
+    "Комментарий",
+]
+UNITS = ["шт", "кг", "м", "м2", "л"]
+# Texts that pandas treats as missing values by default; every backend must keep them
+NA_LIKE_VALUES = ["NA", "N/A", "null", "nan", "NULL"]
+# Every this many rows one has an NA-like nomenclature and unit, and one has no nomenclature
+SPECIAL_ROWS_PERIOD = 100
+
+
+def generate_catalog(folder: str, files: int, rows: int, seed: int = 0) -> List[str]:
+    """Writes synthetic specification workbooks into a folder.
+
+    Args:
+        folder: Target directory.
+        files: Number of workbooks to create.
+        rows: Number of material rows per workbook.
+        seed: Random seed, so repeated runs produce the same catalog.
+
+    Returns:
+        Paths to the created workbooks.
+    """
+    generator = random.Random(seed)
+    materials = [f"Материал {index} ГОСТ {generator.randint(1000, 9999)}-{index % 97}" for index in range(5000)]
+    paths: List[str] = []
+
+    for file_index in range(files):
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet(SPEC_SHEET_NAME)
+        sheet.append(HEADERS)
+        for row_index in range(rows):
+            nomenclature = generator.choice(materials)
+            unit = generator.choice(UNITS)
+            if row_index % SPECIAL_ROWS_PERIOD == 1:
+                nomenclature = unit = generator.choice(NA_LIKE_VALUES)
+            elif row_index % SPECIAL_ROWS_PERIOD == 2:
+                nomenclature = None  # Skipped by every backend
+            sheet.append(
+                [
+                    row_index + 1,
+                    f"ART-{generator.randint(0, 99999):05d}",
+                    nomenclature,
+                    "",
+                    generator.randint(1, 50000),
+                    unit,
+                    "Основной склад",
+                    "",
+                ]
+            )
+
+        path = os.path.join(folder, f"ПФ {file_index}.xlsx")
+        workbook.save(path)
+        paths.append(path)
+
+    return paths
+
+
+def find_workbooks(folder: str) -> List[str]:
+    """Collects specification workbooks from a product folder and its subfolders.
+
+    Args:
+        folder: Product (or products root) folder.
+
+    Returns:
+        Sorted paths to ``.xlsx`` files.
+    """
+    paths: List[str] = []
+    for root, _, file_names in os.walk(folder):
+        for file_name in file_names:
+            if file_name.lower().endswith(".xlsx") and not file_name.startswith("~$"):
+                paths.append(os.path.join(root, file_name))
+    return sorted(paths)
+
+
+def get_peak_rss() -> Optional[int]:
+    """Returns the peak resident set size of the current process in bytes.
+
+    Uses the ``resource`` module where available and falls back to
+    ``psutil`` on Windows.
+
+    Returns:
+        Peak RSS in bytes, or ``None`` if it cannot be measured.
+    """
+    try:
+        import resource
+    except ImportError:
+        resource = None
+
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports kilobytes, macOS reports bytes
+        return peak if sys.platform == "darwin" else peak * 1024
+
+    try:
+        import psutil
+    except ImportError:
+        return None
+
+    memory = psutil.Process().memory_info()
+    return getattr(memory, "peak_wset", memory.rss)
+
+
+def benchmark_backend(backend: str, paths: List[str], repeat: int) -> Tuple[float, int, Optional[int]]:
+    """Reads every workbook with a backend and measures the fastest pass.
+
+    Args:
+        backend: Name of the reader backend.
+        paths: Workbooks to read.
+        repeat: Number of timed passes.
+
+    Returns:
+        Best pass duration in seconds, number of rows read and peak RSS in bytes.
+    """
+    best = float("inf")
+    total_rows = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        total_rows = sum(len(read_specification(path, backend)) for path in paths)
+        best = min(best, time.perf_counter() - started)
+    return best, total_rows, get_peak_rss()
+
+
+def check_backend(backend: str, paths: List[str], reference: List) -> bool:
+    """Checks that a backend returns the same rows as the reference backend."""
+    return [read_specification(path, backend) for path in paths] == reference
+
+
+def run_benchmark(paths: List[str], repeat: int) -> None:
+    """Benchmarks every available backend and prints a table of results.
+
+    Args:
+        paths: Workbooks to read.
+        repeat: Number of timed passes per backend.
+    """
+    reference = [read_specification(path, "pandas") for path in paths]
+
+    print(f"{len(paths)} files, best of {repeat}")
+    print(f"{'backend':<10} {'seconds':>10} {'rows':>10} {'rows/s':>12} {'peak RSS':>10}  identical")
+    for backend in SPEC_READERS:
+        # A fresh process per backend keeps peak memory figures independent
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            seconds, total_rows, peak_rss = executor.submit(benchmark_backend, backend, paths, repeat).result()
+            identical = executor.submit(check_backend, backend, paths, reference).result()
+
+        rss_text = f"{peak_rss / 1024 / 1024:.0f} MB" if peak_rss else "n/a"
+        print(
+            f"{backend:<10} {seconds:>10.3f} {total_rows:>10} {total_rows / seconds:>12.0f} "
+            f"{rss_text:>10}  {identical}"
+        )
+
+
+def main() -> None:
+    """Parses command line arguments and runs the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--folder", help="product folder to read instead of a synthetic catalog")
+    parser.add_argument("--files", type=int, default=20, help="number of synthetic workbooks")
+    parser.add_argument("--rows", type=int, default=2000, help="material rows per synthetic workbook")
+    parser.add_argument("--repeat", type=int, default=3, help="timed passes per backend")
+    args = parser.parse_args()
+
+    if args.folder:
+        paths = find_workbooks(args.folder)
+        if not paths:
+            parser.error(f"no .xlsx files found in {args.folder}")
+        run_benchmark(paths, args.repeat)
+        return
+
+    with tempfile.TemporaryDirectory() as folder:
+        run_benchmark(generate_catalog(folder, args.files, args.rows), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,2 +1,7 @@
 """This package contains various utility classes for the application."""
-from .notifications import Notification
\ No newline at end of file
+from .catalog_index import CatalogIndex
+from .catalog_watcher import CatalogWatcher
+from .material_aggregate import MaterialAggregate
+from .material_usage_index import MaterialUsageIndex
+from .notifications import Notification
+from .spec_cache import SpecificationCache
\ No newline at end of file
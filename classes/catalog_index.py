@@ -0,0 +1,372 @@
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Subfolder with RMP specifications; it belongs to its product and is never a product itself
+RMP_FOLDER_NAME = "рмп"
+
+# Extensions of specification workbooks recorded for every product
+SPEC_FILE_EXTENSIONS = (".xlsx", ".xls")
+
+INDEX_VERSION = 2
+
+
+class CatalogIndex:
+    """A persistent index of the products folder tree.
+
+    Products are the leaf folders of the tree, not counting RMP subfolders.
+    For every folder the index keeps its modification time, the names of its
+    subfolders and the names, sizes and modification times of its workbooks.
+    Creating, deleting or renaming an entry changes the modification time of
+    its folder, so a refresh only has to list the folders whose modification
+    time differs from the recorded one; all other folders cost a single
+    ``os.stat``. RMP subfolders are indexed too, but never descended into.
+
+    On a network share every stat and listing is a round trip, so the tree
+    is walked breadth-first and all folders of a level are checked at once
+    by a bounded pool of threads.
+    """
+
+    def __init__(self, index_path: str, root_path: str, scan_workers: int = 8) -> None:
+        """Initializes an empty index; the index file is read by ``load``.
+
+        Args:
+            index_path: Path to the JSON index file.
+            root_path: Path to the products folder.
+            scan_workers: Maximum number of folders checked concurrently.
+        """
+        self.index_path: str = index_path
+        self.root_path: str = root_path
+        self.scan_workers: int = max(1, int(scan_workers))
+        self._directories: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def load(self) -> None:
+        """Reads the index file; a missing or foreign index is ignored.
+
+        Reading a large index takes a while, so it is not done when the
+        index is created; callers load it off the UI thread.
+        """
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return
+
+        if (
+            isinstance(data, dict)
+            and data.get("version") == INDEX_VERSION
+            and data.get("root") == os.path.abspath(self.root_path)
+            and isinstance(data.get("directories"), dict)
+        ):
+            self._directories = data["directories"]
+
+    def get_products(self) -> List[List[str]]:
+        """Returns the products recorded in the index.
+
+        Returns:
+            Path segments of every product relative to the root folder, in
+            the order ``os.walk`` would visit them.
+        """
+        directories = self._directories
+        products: List[List[str]] = []
+        stack = [""]
+        while stack:
+            relative_path = stack.pop()
+            entry = directories.get(relative_path)
+            if entry is None:
+                continue
+
+            subdirs = [name for name in entry["subdirs"] if name.lower() != RMP_FOLDER_NAME]
+            if not subdirs:
+                if relative_path:
+                    products.append(relative_path.split("/"))
+                continue
+            stack.extend(self._join(relative_path, name) for name in reversed(subdirs))
+        return products
+
+    def get_directories(self) -> List[str]:
+        """Returns full paths of all folders recorded in the index."""
+        return [self._get_full_path(relative_path) for relative_path in self._directories]
+
+    def get_product_files(self, relative_path: str) -> Optional[List[str]]:
+        """Returns the workbooks of a product without listing its folder.
+
+        The recorded listing is validated by comparing the modification times
+        of the product folder and its RMP subfolder. The workbooks themselves
+        are not checked here; they are stat-ed again when they are read.
+
+        Args:
+            relative_path: Product folder, as returned by ``get_relative_path``.
+
+        Returns:
+            Full paths of the product workbooks, with RMP workbooks at the
+            position of the RMP subfolder, as ``os.listdir`` would order them.
+            ``None`` if the product is not indexed or its folders changed.
+        """
+        folders = self._get_product_folders(relative_path)
+        if folders is None:
+            return None
+
+        for folder_relative_path, folder_entry in folders:
+            try:
+                if os.stat(self._get_full_path(folder_relative_path)).st_mtime_ns != folder_entry["mtime_ns"]:
+                    return None
+            except OSError:
+                return None
+        return [file_path for file_path, _ in self._get_recorded_files(folders)]
+
+    def get_product_signatures(self, relative_path: str) -> Optional[Dict[str, Tuple[int, int]]]:
+        """Returns the recorded sizes and modification times of a product's workbooks.
+
+        Nothing is read from disk. Workbooks are usually saved by replacing
+        the file, which changes the modification time of its folder, so the
+        recorded values are as fresh as the last refresh.
+
+        Args:
+            relative_path: Product folder, as returned by ``get_relative_path``.
+
+        Returns:
+            (size, mtime_ns) of every workbook by full path, in the order of
+            ``get_product_files``; ``None`` if the product is not indexed.
+        """
+        folders = self._get_product_folders(relative_path)
+        if folders is None:
+            return None
+        return dict(self._get_recorded_files(folders))
+
+    def get_relative_path(self, path: str) -> Optional[str]:
+        """Converts a full folder path to the form used by the index.
+
+        Args:
+            path: Full path to a folder.
+
+        Returns:
+            The ``/``-separated path relative to the root folder, or ``None``
+            if the folder is outside of it.
+        """
+        relative_path = os.path.relpath(os.path.abspath(path), os.path.abspath(self.root_path))
+        if relative_path == ".":
+            return ""
+        if relative_path == os.pardir or relative_path.startswith(os.pardir + os.sep):
+            return None
+        return relative_path.replace(os.sep, "/")
+
+    def refresh(
+        self,
+        relative_paths: Optional[Iterable[str]] = None,
+        on_progress: Optional[Callable[[int], None]] = None,
+    ) -> Tuple[List[List[str]], List[List[str]]]:
+        """Revalidates the index against the products folder and saves it.
+
+        Args:
+            relative_paths: Folders that are known to have changed, as
+                returned by ``get_relative_path``. Only their subtrees are
+                revalidated; by default the whole tree is.
+            on_progress: Called after each level of the tree with the number
+                of products found so far in the revalidated subtrees.
+
+        Returns:
+            Products that were added and products that were removed.
+        """
+        with self._lock:
+            started = time.perf_counter()
+            previous = self._directories
+            listed_count = 0
+            product_count = 0
+
+            if relative_paths is None:
+                level = [""]
+                directories: Dict[str, Dict] = {}
+            else:
+                level = self._get_subtree_roots(relative_paths)
+                directories = {
+                    relative_path: entry
+                    for relative_path, entry in previous.items()
+                    if not any(self._is_in_subtree(relative_path, root) for root in level)
+                }
+
+            with ThreadPoolExecutor(max_workers=self.scan_workers) as executor:
+                while level:
+                    entries = executor.map(
+                        lambda relative_path: self._scan_directory(relative_path, previous.get(relative_path)),
+                        level,
+                    )
+                    next_level: List[str] = []
+                    for relative_path, entry in zip(level, entries):
+                        if entry is None:
+                            continue
+                        if entry is not previous.get(relative_path):
+                            listed_count += 1
+
+                        directories[relative_path] = entry
+                        if self._is_rmp_folder(relative_path):
+                            continue
+
+                        if relative_path and all(name.lower() == RMP_FOLDER_NAME for name in entry["subdirs"]):
+                            product_count += 1
+                        next_level.extend(self._join(relative_path, name) for name in entry["subdirs"])
+                    level = next_level
+
+                    if on_progress is not None:
+                        on_progress(product_count)
+
+            added: List[List[str]] = []
+            removed: List[List[str]] = []
+            if directories != previous:
+                previous_products = self.get_products()
+                self._directories = directories
+                products = self.get_products()
+
+                previous_keys = {tuple(product) for product in previous_products}
+                product_keys = {tuple(product) for product in products}
+                added = [product for product in products if tuple(product) not in previous_keys]
+                removed = [product for product in previous_products if tuple(product) not in product_keys]
+                self._save()
+
+            logger.info(
+                "Catalog scan: %d directories, %d listed, %.2f s, %d workers",
+                len(directories),
+                listed_count,
+                time.perf_counter() - started,
+                self.scan_workers,
+            )
+            return added, removed
+
+    def _get_product_folders(self, relative_path: str) -> Optional[List[Tuple[str, Dict]]]:
+        """Returns the entries of a product folder and of its RMP subfolder, if any.
+
+        Args:
+            relative_path: Product folder relative to the root.
+
+        Returns:
+            (relative path, entry) of the product folder followed by its RMP
+            subfolder, or ``None`` if either is not indexed.
+        """
+        entry = self._directories.get(relative_path)
+        if entry is None:
+            return None
+
+        folders = [(relative_path, entry)]
+        if entry["rmp_index"] is not None:
+            rmp_name = next(name for name in entry["subdirs"] if name.lower() == RMP_FOLDER_NAME)
+            rmp_relative_path = self._join(relative_path, rmp_name)
+            rmp_entry = self._directories.get(rmp_relative_path)
+            if rmp_entry is None:
+                return None
+            folders.append((rmp_relative_path, rmp_entry))
+        return folders
+
+    def _get_recorded_files(self, folders: List[Tuple[str, Dict]]) -> List[Tuple[str, Tuple[int, int]]]:
+        """Lists the recorded workbooks of a product.
+
+        Args:
+            folders: Product folder and RMP subfolder, as returned by ``_get_product_folders``.
+
+        Returns:
+            (full path, (size, mtime_ns)) of every workbook, with RMP workbooks
+            at the position of the RMP subfolder, as ``os.listdir`` would order them.
+        """
+        (relative_path, entry), *rmp_folders = folders
+        product_path = self._get_full_path(relative_path)
+        files = [(os.path.join(product_path, name), (size, mtime_ns)) for name, size, mtime_ns in entry["files"]]
+        for rmp_relative_path, rmp_entry in rmp_folders:
+            rmp_path = self._get_full_path(rmp_relative_path)
+            rmp_index = entry["rmp_index"]
+            files[rmp_index:rmp_index] = [
+                (os.path.join(rmp_path, name), (size, mtime_ns)) for name, size, mtime_ns in rmp_entry["files"]
+            ]
+        return files
+
+    def _get_subtree_roots(self, relative_paths: Iterable[str]) -> List[str]:
+        """Drops folders that lie inside another folder of the list.
+
+        Args:
+            relative_paths: Changed folders.
+
+        Returns:
+            Folders whose subtrees cover all changed folders.
+        """
+        roots: List[str] = []
+        for relative_path in sorted(set(relative_paths), key=len):
+            if not any(self._is_in_subtree(relative_path, root) for root in roots):
+                roots.append(relative_path)
+        return roots
+
+    @staticmethod
+    def _is_in_subtree(relative_path: str, root: str) -> bool:
+        """Checks whether a folder is a root folder or lies inside it."""
+        return not root or relative_path == root or relative_path.startswith(root + "/")
+
+    def _scan_directory(self, relative_path: str, entry: Optional[Dict]) -> Optional[Dict]:
+        """Returns the index entry of a folder, listing it only if it changed.
+
+        Args:
+            relative_path: Folder path relative to the root, ``/``-separated.
+            entry: Entry recorded for the folder by the previous refresh.
+
+        Returns:
+            The up-to-date entry, or ``None`` if the folder no longer exists.
+            If it cannot be read for another reason, such as a dropped
+            network connection, the previous entry is kept, so a transient
+            error never removes the products below the folder.
+        """
+        path = self._get_full_path(relative_path)
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+            if entry is not None and entry["mtime_ns"] == mtime_ns:
+                return entry
+
+            subdirs: List[str] = []
+            files: List[List] = []
+            rmp_index = None
+            with os.scandir(path) as items:
+                for item in items:
+                    if item.is_dir():
+                        if rmp_index is None and item.name.lower() == RMP_FOLDER_NAME:
+                            rmp_index = len(files)
+                        subdirs.append(item.name)
+                    elif item.name.lower().endswith(SPEC_FILE_EXTENSIONS) and item.is_file():
+                        stat = item.stat()
+                        files.append([item.name, stat.st_size, stat.st_mtime_ns])
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        except OSError as e:
+            logger.warning("Catalog folder cannot be read, keeping its previous entry: %s: %s", path, e)
+            return entry
+        return {"mtime_ns": mtime_ns, "subdirs": subdirs, "files": files, "rmp_index": rmp_index}
+
+    def _save(self) -> None:
+        """Writes the index file atomically, so a crash never leaves it half written."""
+        folder = os.path.dirname(os.path.abspath(self.index_path))
+        os.makedirs(folder, exist_ok=True)
+
+        temp_path = f"{self.index_path}.tmp"
+        data = {
+            "version": INDEX_VERSION,
+            "root": os.path.abspath(self.root_path),
+            "directories": self._directories,
+        }
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(data, file, ensure_ascii=False)
+        os.replace(temp_path, self.index_path)
+
+    def _get_full_path(self, relative_path: str) -> str:
+        """Converts a relative index path to a full folder path."""
+        return os.path.join(self.root_path, *relative_path.split("/")) if relative_path else self.root_path
+
+    @staticmethod
+    def _is_rmp_folder(relative_path: str) -> bool:
+        """Checks whether a relative index path points to an RMP subfolder."""
+        return relative_path.rsplit("/", 1)[-1].lower() == RMP_FOLDER_NAME
+
+    @staticmethod
+    def _join(relative_path: str, name: str) -> str:
+        """Appends a folder name to a relative index path."""
+        return f"{relative_path}/{name}" if relative_path else name
@@ -0,0 +1,135 @@
+import ctypes
+import os
+import sys
+from typing import List, Optional, Set
+
+from PyQt5.QtCore import QFileSystemWatcher, QObject, QTimer, pyqtSignal
+
+# Delay that merges a burst of file system events into one update, in milliseconds
+EVENTS_DEBOUNCE_MS = 500
+
+# Drive type returned by GetDriveTypeW for mapped network drives
+DRIVE_REMOTE = 4
+
+
+class CatalogWatcher(QObject):
+    """Watches the products folder tree and reports changed folders.
+
+    In ``"watcher"`` mode every folder of the catalog is watched with
+    ``QFileSystemWatcher``; bursts of events, such as copying a whole product
+    folder, are merged into one report. Change notifications are unreliable
+    on network shares, so ``"poll"`` mode instead reports the root folder
+    periodically, and ``"auto"`` picks polling for network paths, whether
+    they are UNC paths or mapped drive letters. The watcher
+    also falls back to polling if the system refuses to watch the folders.
+
+    Attributes:
+        directories_changed: Signal with the full paths of changed folders.
+    """
+
+    directories_changed = pyqtSignal(list)
+
+    def __init__(
+        self, root_path: str, mode: str = "auto", poll_interval_sec: int = 60, parent: Optional[QObject] = None
+    ) -> None:
+        """Initializes the watcher; nothing is watched until ``set_directories``.
+
+        Args:
+            root_path: Path to the products folder.
+            mode: ``"auto"``, ``"watcher"``, ``"poll"`` or ``"off"``.
+            poll_interval_sec: Interval between revalidations in poll mode.
+            parent: Parent Qt object.
+        """
+        super().__init__(parent)
+        self.root_path: str = root_path
+        self.mode: str = self._resolve_mode(mode, root_path)
+        self._changed_directories: Set[str] = set()
+
+        self._watcher: Optional[QFileSystemWatcher] = None
+        if self.mode == "watcher":
+            self._watcher = QFileSystemWatcher(self)
+            self._watcher.directoryChanged.connect(self._on_directory_changed)
+
+        self._debounce_timer = QTimer(self)
+        self._debounce_timer.setSingleShot(True)
+        self._debounce_timer.setInterval(EVENTS_DEBOUNCE_MS)
+        self._debounce_timer.timeout.connect(self._emit_changed_directories)
+
+        self._poll_timer = QTimer(self)
+        self._poll_timer.setInterval(max(1, int(poll_interval_sec)) * 1000)
+        self._poll_timer.timeout.connect(lambda: self.directories_changed.emit([self.root_path]))
+        if self.mode == "poll":
+            self._poll_timer.start()
+
+    def set_directories(self, directories: List[str]) -> None:
+        """Replaces the set of watched folders.
+
+        Args:
+            directories: Full paths of all folders of the catalog.
+        """
+        if self._watcher is None:
+            return
+
+        watched = set(self._watcher.directories())
+        target = set(directories)
+        if watched - target:
+            self._watcher.removePaths(list(watched - target))
+        if target - watched:
+            failed = self._watcher.addPaths(list(target - watched))
+            if failed:
+                self._switch_to_polling()
+
+    def _on_directory_changed(self, path: str) -> None:
+        """Collects a changed folder and restarts the debounce timer."""
+        self._changed_directories.add(path)
+        self._debounce_timer.start()
+
+    def _emit_changed_directories(self) -> None:
+        """Reports the folders collected since the last report."""
+        directories = sorted(self._changed_directories)
+        self._changed_directories.clear()
+        if directories:
+            self.directories_changed.emit(directories)
+
+    def _switch_to_polling(self) -> None:
+        """Stops watching folders and revalidates the catalog periodically instead."""
+        if self._watcher is not None:
+            self._watcher.deleteLater()
+            self._watcher = None
+        self.mode = "poll"
+        self._poll_timer.start()
+
+    @staticmethod
+    def _resolve_mode(mode: str, root_path: str) -> str:
+        """Chooses between watching and polling for ``"auto"`` mode.
+
+        Args:
+            mode: Configured mode.
+            root_path: Path to the products folder.
+
+        Returns:
+            ``"watcher"``, ``"poll"`` or ``"off"``.
+        """
+        if mode in ("watcher", "poll", "off"):
+            return mode
+        return "poll" if CatalogWatcher._is_network_path(root_path) else "watcher"
+
+    @staticmethod
+    def _is_network_path(path: str) -> bool:
+        """Checks whether a folder is on a network share.
+
+        Args:
+            path: Path to the folder.
+
+        Returns:
+            True for UNC paths and, on Windows, for paths on mapped network drives.
+        """
+        if path.startswith(("\\\\", "//")):
+            return True
+        if sys.platform != "win32":
+            return False
+
+        drive = os.path.splitdrive(os.path.abspath(path))[0]
+        if drive.startswith(("\\\\", "//")):
+            return True
+        return bool(drive) and ctypes.windll.kernel32.GetDriveTypeW(drive + "\\") == DRIVE_REMOTE
@@ -0,0 +1,192 @@
+import os
+from typing import Dict, Iterable, List, Set, Tuple
+
+import pandas as pd
+
+from utils.materials import MATERIAL_COLUMNS, NOM_KEY, QTY_KEY, RMP_KEY, UNIT_KEY
+from utils.materials import aggregate_materials, build_materials_frame, materials_to_records
+from utils.spec_readers import SpecRow
+
+# Number of files of the product that mention a nomenclature
+FILES_KEY = "files"
+
+
+class MaterialAggregate:
+    """Aggregated materials of one product, kept together with per-file contributions.
+
+    Every specification file contributes a small table of per-unit quantities.
+    When a single file changes, only the totals of the nomenclatures it
+    mentions are summed again from the stored contributions, so the other
+    files of the product never have to be parsed again. Totals are never
+    updated by subtraction, which would leave rounding residue behind; they
+    are recomputed once per ``get_materials`` call, however many files
+    changed. Semi-finished products are masked only when the materials are
+    requested, because the set of semi-finished names depends on which files
+    the product currently has. As in a full aggregation, the unit and RMP
+    flag of a nomenclature come from the first file that mentions it.
+    """
+
+    def __init__(self) -> None:
+        """Creates an empty aggregate."""
+        self.signatures: Dict[str, Tuple[int, int]] = {}
+        self._contributions: Dict[str, pd.DataFrame] = {}
+        self._totals: pd.DataFrame = self._contribution([])
+        self._is_order_stale: bool = False
+        # Nomenclatures whose quantities must be summed again from the contributions
+        self._stale_nomenclatures: Set[str] = set()
+
+    @classmethod
+    def build(cls, files: Iterable[Tuple[str, Tuple[int, int], List[SpecRow]]]) -> "MaterialAggregate":
+        """Aggregates a set of files from scratch.
+
+        Totals are computed over all rows at once, so they are identical to a
+        plain aggregation of the same files.
+
+        Args:
+            files: (file_path, signature, rows) of each file, in merge order.
+
+        Returns:
+            The populated aggregate.
+        """
+        aggregate = cls()
+        rows_per_file: List[List[SpecRow]] = []
+        for file_path, signature, rows in files:
+            aggregate.signatures[file_path] = signature
+            aggregate._contributions[file_path] = aggregate._contribution(rows)
+            rows_per_file.append(rows)
+
+        totals = aggregate_materials(build_materials_frame(rows_per_file), []).set_index(NOM_KEY)
+        if aggregate._contributions:
+            file_counts = pd.concat(
+                [contribution[FILES_KEY] for contribution in aggregate._contributions.values()]
+            ).groupby(level=0).sum()
+            totals[FILES_KEY] = file_counts.reindex(totals.index)
+        else:
+            totals[FILES_KEY] = 0
+        aggregate._totals = totals
+        return aggregate
+
+    @property
+    def files(self) -> List[str]:
+        """Paths of the files included in the aggregate."""
+        return list(self._contributions)
+
+    def copy(self) -> "MaterialAggregate":
+        """Returns an independent copy that can be updated without affecting this one."""
+        aggregate = MaterialAggregate()
+        aggregate.signatures = dict(self.signatures)
+        aggregate._contributions = dict(self._contributions)
+        aggregate._totals = self._totals.copy()
+        aggregate._is_order_stale = self._is_order_stale
+        aggregate._stale_nomenclatures = set(self._stale_nomenclatures)
+        return aggregate
+
+    def update_file(self, file_path: str, signature: Tuple[int, int], rows: List[SpecRow]) -> None:
+        """Replaces the contribution of a new or changed file.
+
+        Args:
+            file_path: Path to the specification file.
+            signature: (size, mtime_ns) of the file the rows were parsed from.
+            rows: Normalized rows of the file.
+        """
+        self.remove_file(file_path)
+
+        contribution = self._contribution(rows)
+        totals = self._totals
+        existing = contribution.index.intersection(totals.index, sort=False)
+        totals.loc[existing, FILES_KEY] += 1
+
+        added = contribution.loc[contribution.index.difference(totals.index, sort=False)]
+        if len(added):
+            totals = pd.concat([totals, added])
+
+        self._totals = totals
+        self._contributions[file_path] = contribution
+        self.signatures[file_path] = signature
+        self._stale_nomenclatures.update(existing)
+        self._is_order_stale = True
+
+    def remove_file(self, file_path: str) -> None:
+        """Drops the contribution of a file that changed or was deleted.
+
+        Args:
+            file_path: Path to the specification file.
+        """
+        contribution = self._contributions.pop(file_path, None)
+        self.signatures.pop(file_path, None)
+        if contribution is None:
+            return
+
+        totals = self._totals
+        totals.loc[contribution.index, FILES_KEY] -= 1
+        self._totals = totals[totals[FILES_KEY] > 0].copy()
+        self._stale_nomenclatures.update(contribution.index)
+        self._is_order_stale = True
+
+    def get_materials(self, semi_finished_products: List[str]) -> List[Dict]:
+        """Returns the aggregated materials in the list-of-dicts form used by the views.
+
+        Args:
+            semi_finished_products: Excel file paths of the product in merge
+                order; materials named after them are excluded.
+
+        Returns:
+            Materials in first-seen order, with per-unit quantities.
+        """
+        if self._stale_nomenclatures:
+            self._recompute_quantities()
+        if self._is_order_stale:
+            self._restore_first_seen_order(semi_finished_products)
+
+        totals = self._totals
+        semi_product_names = [
+            os.path.splitext(os.path.basename(path))[0].lower().strip() for path in semi_finished_products
+        ]
+        is_semi_product = totals.index.str.lower().str.strip().isin(semi_product_names)
+        return materials_to_records(totals[~is_semi_product].reset_index()[MATERIAL_COLUMNS])
+
+    def _recompute_quantities(self) -> None:
+        """Sums the quantities of the stale nomenclatures again from the contributions of their files."""
+        nomenclatures = self._totals.index[self._totals.index.isin(self._stale_nomenclatures)]
+        self._stale_nomenclatures = set()
+        if not len(nomenclatures):
+            return
+
+        quantities = pd.concat([contribution[QTY_KEY] for contribution in self._contributions.values()])
+        quantities = quantities[quantities.index.isin(nomenclatures)].groupby(level=0).sum()
+        self._totals.loc[nomenclatures, QTY_KEY] = quantities.reindex(nomenclatures)
+
+    def _restore_first_seen_order(self, file_paths: List[str]) -> None:
+        """Reorders totals as a full aggregation of the files would order them.
+
+        The unit and RMP flag of every nomenclature are taken again from the
+        first file that mentions it, since that file may have been replaced
+        or removed.
+
+        Args:
+            file_paths: Files of the product in merge order.
+        """
+        contributions = [
+            self._contributions[file_path] for file_path in file_paths if file_path in self._contributions
+        ]
+        if contributions:
+            first_seen = pd.concat([contribution[[UNIT_KEY, RMP_KEY]] for contribution in contributions])
+            first_seen = first_seen[~first_seen.index.duplicated()]
+            totals = self._totals.reindex(first_seen.index)
+            totals[UNIT_KEY] = first_seen[UNIT_KEY]
+            totals[RMP_KEY] = first_seen[RMP_KEY]
+            self._totals = totals
+        self._is_order_stale = False
+
+    def _contribution(self, rows: List[SpecRow]) -> pd.DataFrame:
+        """Sums the rows of a single file per nomenclature.
+
+        Args:
+            rows: Normalized rows of the file.
+
+        Returns:
+            Frame indexed by nomenclature with quantity, unit, RMP and file count.
+        """
+        contribution = aggregate_materials(build_materials_frame([rows]), []).set_index(NOM_KEY)
+        contribution[FILES_KEY] = 1
+        return contribution[[QTY_KEY, UNIT_KEY, RMP_KEY, FILES_KEY]]
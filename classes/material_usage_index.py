@@ -0,0 +1,154 @@
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Tuple
+
+from utils.materials import NOM_KEY, QTY_KEY, UNIT_KEY
+from utils.search_index import normalize_search_key
+
+
+class MaterialUsageIndex:
+    """A persistent reverse index from materials to the products that use them.
+
+    For every indexed product the aggregated materials are stored as rows of
+    (nomenclature, product, per-unit quantity, unit), indexed by the
+    normalized nomenclature, so the products using a material are found by
+    a single index lookup instead of opening every workbook. Each product is
+    stored together with the (size, mtime_ns) signatures of its workbooks;
+    a product is indexed again only when they change, and its rows are
+    replaced in one transaction.
+    """
+
+    def __init__(self, db_path: str) -> None:
+        """Opens (or creates) the index database.
+
+        Args:
+            db_path: Path to the SQLite database file.
+        """
+        self.db_path: str = db_path
+        self._lock = threading.Lock()
+
+        folder = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(folder, exist_ok=True)
+
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS products (
+                product TEXT PRIMARY KEY,
+                signatures TEXT NOT NULL
+            )
+            """
+        )
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS usages (
+                nomenclature_key TEXT NOT NULL,
+                nomenclature TEXT NOT NULL,
+                product TEXT NOT NULL,
+                quantity REAL NOT NULL,
+                unit TEXT NOT NULL
+            )
+            """
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS idx_usages_nomenclature ON usages (nomenclature_key)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS idx_usages_product ON usages (product)")
+        self._connection.commit()
+
+        # Signatures are compared for every product on each update, so they are kept in memory
+        self._signatures: Dict[str, Dict[str, Tuple[int, int]]] = {
+            product: {path: tuple(signature) for path, signature in json.loads(signatures).items()}
+            for product, signatures in self._connection.execute("SELECT product, signatures FROM products")
+        }
+
+    def get_signatures(self, product: str) -> Dict[str, Tuple[int, int]]:
+        """Returns the workbook signatures a product was indexed with.
+
+        Args:
+            product: Product folder relative to the products folder.
+
+        Returns:
+            (size, mtime_ns) of every workbook by path; empty if the product
+            is not indexed.
+        """
+        return self._signatures.get(product, {})
+
+    def get_products(self) -> List[str]:
+        """Returns all indexed products."""
+        return list(self._signatures)
+
+    def update_product(self, product: str, signatures: Dict[str, Tuple[int, int]], materials: List[Dict]) -> None:
+        """Replaces the materials recorded for a product.
+
+        Args:
+            product: Product folder relative to the products folder.
+            signatures: (size, mtime_ns) of the workbooks the materials were read from.
+            materials: Aggregated per-unit materials of the product.
+        """
+        rows = [
+            (
+                normalize_search_key(str(item[NOM_KEY]).strip()),
+                str(item[NOM_KEY]),
+                product,
+                float(item[QTY_KEY]),
+                str(item[UNIT_KEY]),
+            )
+            for item in materials
+        ]
+        payload = json.dumps(signatures, ensure_ascii=False, separators=(",", ":"))
+
+        with self._lock:
+            with self._connection:
+                self._connection.execute("DELETE FROM usages WHERE product = ?", (product,))
+                self._connection.executemany(
+                    "INSERT INTO usages (nomenclature_key, nomenclature, product, quantity, unit) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    rows,
+                )
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO products (product, signatures) VALUES (?, ?)", (product, payload)
+                )
+            self._signatures[product] = dict(signatures)
+
+    def remove_products(self, products: Iterable[str]) -> None:
+        """Forgets products that no longer exist.
+
+        Args:
+            products: Product folders relative to the products folder.
+        """
+        keys = [(product,) for product in products]
+        if not keys:
+            return
+
+        with self._lock:
+            with self._connection:
+                self._connection.executemany("DELETE FROM usages WHERE product = ?", keys)
+                self._connection.executemany("DELETE FROM products WHERE product = ?", keys)
+            for (product,) in keys:
+                self._signatures.pop(product, None)
+
+    def find_products(self, nomenclature: str) -> List[Tuple[str, float, str]]:
+        """Finds the products whose specifications contain a material.
+
+        The nomenclature is compared case-insensitively.
+
+        Args:
+            nomenclature: Name of the material.
+
+        Returns:
+            (product, per-unit quantity, unit) for every product using the
+            material, ordered by product.
+        """
+        with self._lock:
+            return self._connection.execute(
+                "SELECT product, quantity, unit FROM usages WHERE nomenclature_key = ? ORDER BY product",
+                (normalize_search_key(nomenclature.strip()),),
+            ).fetchall()
+
+    def close(self) -> None:
+        """Closes the underlying database connection."""
+        with self._lock:
+            self._connection.close()
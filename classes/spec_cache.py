@@ -0,0 +1,182 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from utils.spec_readers import DEFAULT_SPEC_READER, SPEC_ROW_FORMAT_VERSION, SpecRow
+
+# Version of the database layout; older databases are recreated
+CACHE_SCHEMA_VERSION = 2
+
+
+class SpecificationCache:
+    """A persistent on-disk cache of parsed specification workbooks.
+
+    Each workbook is stored as a list of normalized rows keyed by its path.
+    An entry is only valid while the file size and modification time match
+    the values recorded when it was parsed, so a cache lookup costs a single
+    ``os.stat`` instead of a full Excel parse. Readers may normalize cells
+    differently, so an entry is also tied to the reader backend and the row
+    format version it was parsed with. The total size of the stored
+    rows is capped; the least recently used entries are evicted first.
+    """
+
+    def __init__(self, db_path: str, max_size_mb: int = 256, reader: str = DEFAULT_SPEC_READER) -> None:
+        """Opens (or creates) the cache database.
+
+        Args:
+            db_path: Path to the SQLite database file.
+            max_size_mb: Size cap for the stored rows, in megabytes.
+            reader: Reader backend the cached rows are parsed with; rows
+                parsed by another backend are treated as misses.
+        """
+        self.db_path: str = db_path
+        self.max_size_bytes: int = max(0, int(max_size_mb)) * 1024 * 1024
+        self.reader: str = reader
+        self._lock = threading.Lock()
+
+        folder = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(folder, exist_ok=True)
+
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        if self._connection.execute("PRAGMA user_version").fetchone()[0] != CACHE_SCHEMA_VERSION:
+            self._connection.execute("DROP TABLE IF EXISTS specifications")
+            self._connection.execute(f"PRAGMA user_version = {CACHE_SCHEMA_VERSION}")
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS specifications (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                reader TEXT NOT NULL,
+                format_version INTEGER NOT NULL,
+                rows TEXT NOT NULL,
+                byte_size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS idx_specifications_last_access "
+            "ON specifications (last_access)"
+        )
+        self._connection.commit()
+
+    @staticmethod
+    def get_file_signature(file_path: str) -> Tuple[int, int]:
+        """Returns the (size, mtime_ns) pair that identifies a file version.
+
+        Args:
+            file_path: Path to the file.
+
+        Returns:
+            Size in bytes and modification time in nanoseconds.
+
+        Raises:
+            OSError: If the file cannot be accessed.
+        """
+        stat = os.stat(file_path)
+        return stat.st_size, stat.st_mtime_ns
+
+    def get(self, file_path: str, signature: Tuple[int, int], touch: bool = True) -> Optional[List[SpecRow]]:
+        """Returns cached rows for a file if the stored version is current.
+
+        Args:
+            file_path: Path to the specification workbook.
+            signature: Current (size, mtime_ns) of the file.
+            touch: Whether the lookup counts as a use for eviction; background
+                readers pass False, so they never keep entries alive.
+
+        Returns:
+            The cached rows, or ``None`` on a miss, a stale entry or rows
+            parsed by another reader or row format version.
+        """
+        with self._lock:
+            record = self._connection.execute(
+                "SELECT size, mtime_ns, reader, format_version, rows FROM specifications WHERE path = ?",
+                (self._key(file_path),),
+            ).fetchone()
+            if record is None or record[:4] != (*signature, self.reader, SPEC_ROW_FORMAT_VERSION):
+                return None
+
+            if touch:
+                self._connection.execute(
+                    "UPDATE specifications SET last_access = ? WHERE path = ?",
+                    (time.time(), self._key(file_path)),
+                )
+                self._connection.commit()
+
+        return [tuple(row) for row in json.loads(record[4])]
+
+    def put(self, file_path: str, signature: Tuple[int, int], rows: List[SpecRow]) -> None:
+        """Stores parsed rows for a file and evicts old entries if needed.
+
+        Args:
+            file_path: Path to the specification workbook.
+            signature: (size, mtime_ns) of the file the rows were parsed from.
+            rows: Normalized rows of the workbook.
+        """
+        payload = json.dumps(rows, ensure_ascii=False, separators=(",", ":"))
+        byte_size = len(payload.encode("utf-8"))
+        if self.max_size_bytes and byte_size > self.max_size_bytes:
+            return
+
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO specifications "
+                "(path, size, mtime_ns, reader, format_version, rows, byte_size, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    self._key(file_path),
+                    signature[0],
+                    signature[1],
+                    self.reader,
+                    SPEC_ROW_FORMAT_VERSION,
+                    payload,
+                    byte_size,
+                    time.time(),
+                ),
+            )
+            self._evict()
+            self._connection.commit()
+
+    def clear(self) -> None:
+        """Removes every cached workbook."""
+        with self._lock:
+            self._connection.execute("DELETE FROM specifications")
+            self._connection.commit()
+            self._connection.execute("VACUUM")
+
+    def close(self) -> None:
+        """Closes the underlying database connection."""
+        with self._lock:
+            self._connection.close()
+
+    def _evict(self) -> None:
+        """Deletes least recently used entries until the size cap is met."""
+        if not self.max_size_bytes:
+            return
+
+        total = self._connection.execute(
+            "SELECT COALESCE(SUM(byte_size), 0) FROM specifications"
+        ).fetchone()[0]
+        if total <= self.max_size_bytes:
+            return
+
+        cursor = self._connection.execute(
+            "SELECT path, byte_size FROM specifications ORDER BY last_access ASC"
+        )
+        stale_paths: List[Tuple[str]] = []
+        for path, byte_size in cursor.fetchall():
+            if total <= self.max_size_bytes:
+                break
+            stale_paths.append((path,))
+            total -= byte_size
+
+        self._connection.executemany("DELETE FROM specifications WHERE path = ?", stale_paths)
+
+    def _key(self, file_path: str) -> str:
+        """Normalizes a file path so that equal paths share one entry."""
+        return os.path.normcase(os.path.abspath(file_path))
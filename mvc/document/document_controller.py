@@ -1,8 +1,8 @@
-from PyQt5.QtCore import QStringListModel
 from PyQt5.QtWidgets import QFileDialog, QLineEdit
 
 from classes import Notification
-from utils.proxy_models import CustomFilterProxyModel
+from utils.list_models import KeyedStringListModel
+from utils.proxy_models import KeyFilterProxyModel
 
 
 
@@ -24,7 +24,7 @@ class DocumentController:
         self.model = model
         self.view = view
         self.is_highlighting: bool = False
-        self.proxy_models: dict[QLineEdit, CustomFilterProxyModel] = {}
+        self.proxy_models: dict[QLineEdit, KeyFilterProxyModel] = {}
 
         # Set initial state of the view
         self._set_lineedits()
@@ -76,7 +76,7 @@ class DocumentController:
             return
 
         if line_edit in self.proxy_models:
-            self.proxy_models[line_edit].setFilterRegExp(text)
+            self.proxy_models[line_edit].set_filter_text(text)
 
     def on_export_button_clicked(self) -> None:
         """Handles the export button click event."""
@@ -156,8 +156,8 @@ class DocumentController:
         }
 
         for line_edit, suggestions in completer_fields.items():
-            string_list_model = QStringListModel(suggestions)
-            proxy_model = CustomFilterProxyModel()
+            string_list_model = KeyedStringListModel(suggestions)
+            proxy_model = KeyFilterProxyModel()
             proxy_model.setSourceModel(string_list_model)
             self.proxy_models[line_edit] = proxy_model
 
@@ -1,16 +1,22 @@
 import sys
+from typing import Optional
 
-from PyQt5.QtCore import Qt, QStringListModel
+from PyQt5.QtCore import QAbstractItemModel, Qt, QTimer
 
 from classes import Notification
 from mvc.document import create_document_window
-from utils.proxy_models import CustomFilterProxyModel
+from utils.list_models import KeyedStringListModel
+from utils.material_search import MaterialSearch
+from utils.proxy_models import IndexedFilterProxyModel
 
 
 NOM_KEY = "Номенклатура"
 QTY_KEY = "Количество"
 UNIT_KEY = "Ед. изм."
 
+# Maximum number of products listed in the material usage message
+MATERIAL_USAGE_LIMIT = 30
+
 
 class MainController:
     """The main controller for the application.
@@ -30,6 +36,7 @@ class MainController:
         self.model = model
         self.view = view
         self.is_highlighting: bool = False
+        self.reset_selection_on_load: bool = False
         self.current_table_data: list[dict] = []
         self.search_filters: dict[str, bool] = {
             "name": True,
@@ -38,28 +45,37 @@ class MainController:
         }
 
         self.document_window = None  # Reference to the document window
+        # Search over the current product's materials, rebuilt when they change
+        self._material_search: Optional[MaterialSearch] = None
 
-        self._check_program_version()
         self._check_available_products_folder()
-
-        # Set up the QCompleter for the search field
-        self.model.update_products_names()
-        suggestions_lst = [" ".join(name) for name in self.model.products_names]
-
-        string_list_model = QStringListModel(suggestions_lst)
-
-        self.proxy_model = CustomFilterProxyModel()
-        self.proxy_model.setSourceModel(string_list_model)
+        # Search stays disabled until the catalog is loaded, or until the
+        # products known from the last launch are read from the index
+        self.is_catalog_loading: bool = not self.model.products_names
+
+        # Set up the QCompleter for the search field. The products model and its
+        # search index live for the whole session; materials get their own proxy.
+        self.products_list_model = KeyedStringListModel(list(self.model.product_names_by_path.values()))
+        self.products_proxy_model = IndexedFilterProxyModel()
+        self.products_proxy_model.setSourceModel(self.products_list_model)
+        self.materials_proxy_model = IndexedFilterProxyModel()
+        # In fuzzy mode the suggestions are the best ranked products, replaced on every search
+        self.fuzzy_results_model = KeyedStringListModel()
+        self.proxy_model = self._get_products_completer_model()
 
         self.completer = self.view.set_search_completer(self.proxy_model)
         self.completer.highlighted.connect(self.on_completer_highlighted)
 
-        self.view.get_search_line_edit().textChanged.connect(
-            self.on_text_changed_for_filter
-        )
+        # Keystrokes are coalesced into a single search evaluation after a short pause
+        self._search_timer = QTimer()
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(self.model.search_debounce_ms)
+        self._search_timer.timeout.connect(self._run_scheduled_search)
+        self._is_filter_update_pending: bool = False
+        self._last_search: Optional[tuple[bool, str]] = None
 
         # Connect view signals to controller slots
-        self.view.search_field_changed(self.on_search_field_changed)
+        self.view.search_field_changed(self.on_search_text_changed)
         self.view.create_document_button_clicked(self.on_create_document_button_clicked)
         self.view.norms_calculations_changed(self.on_norms_calculations_changed)
         self.view.export_button_clicked(self.on_export_button_clicked)
@@ -67,6 +83,10 @@ class MainController:
             self.on_search_in_materials_checkbox_state_changed
         )
         self.view.header_checkbox_state_changed(self.on_header_checkbox_state_changed)
+        self.view.row_checkbox_state_changed(self.on_row_checkbox_state_changed)
+        self.view.setup_material_context_menu(
+            self.on_material_usage_requested, self.on_invert_selection_requested
+        )
         self.view.setup_search_filters_menu(
             self.search_filters, self.on_search_filter_toggled
         )
@@ -75,10 +95,21 @@ class MainController:
 
         # Connect model signals to controller slots
         self.model.show_notification.connect(self.show_notification)
+        self.model.materials_load_progress.connect(self.on_materials_load_progress)
+        self.model.materials_load_partial.connect(self.on_materials_load_partial)
+        self.model.materials_loaded.connect(self.on_materials_loaded)
+        self.model.products_names_updated.connect(self.on_products_names_updated)
+        self.model.catalog_scan_progress.connect(self.on_catalog_scan_progress)
+        self.model.catalog_loaded.connect(self.on_catalog_loaded)
+        self.model.program_version_checked.connect(self.on_program_version_checked)
 
         # Disable header checkbox until data appears
         self.view.set_header_checkbox_enabled(False)
 
+        # Slow network work starts once the window is shown
+        QTimer.singleShot(0, self.model.check_program_version_in_thread)
+        QTimer.singleShot(0, self.model.load_catalog_in_thread)
+
     def show_notification(self, msg_type: str, text: str) -> None:
         """Shows a notification message and re-enables the window.
 
@@ -98,55 +129,114 @@ class MainController:
         # If not searching within materials, search for products
         if not self.model.search_in_materials:
             product_name = search_text
-            product_tuple = next(
-                (
-                    name
-                    for name in self.model.products_names
-                    if " ".join(name) == product_name
-                ),
-                None,
-            )
+            product_tuple = self.model.find_product(product_name)
 
             if product_tuple:
-                is_new_product = product_name != self.model.current_product
-                self.model.current_product = product_name
-                semi_finished_products = self.model.get_semi_finished_products(
-                    product_tuple
-                )
-                if semi_finished_products:
-                    product_materials = self.model.get_product_materials(
-                        semi_finished_products
-                    )
-                    self.model.current_product_materials = product_materials
-                    self.model.sync_material_selection(
-                        product_materials, reset=is_new_product
-                    )
-                    data_for_view = product_materials
-                else:
-                    self.model.sync_material_selection([], reset=is_new_product)
-                    self.model.current_product_materials = []
+                self.reset_selection_on_load = product_name != self.model.current_product
+                if self.reset_selection_on_load:
+                    # Do not keep the previous product on screen while the new one loads
+                    self.model.set_product_materials([], reset_selection=True)
                     self.model.current_semi_finished_products = []
-            else:
-                self.model.current_product_materials = []
-                self.model.current_semi_finished_products = []
-                self.model.sync_material_selection([], reset=True)
+                    self._update_table([])
+                self.model.current_product = product_name
+                self.model.load_product_in_thread(product_tuple)
+                self.view.set_loading_status("Загрузка спецификаций...")
+                return
+
+            self.model.cancel_product_loading()
+            self.view.set_loading_status("")
+            self.model.set_product_materials([], reset_selection=True)
+            self.model.current_semi_finished_products = []
         # Otherwise, filter the materials of the current product
         else:
-            active_filters = [key for key, value in self.search_filters.items() if value]
-            if not active_filters:
-                data_for_view = self.model.current_product_materials
-                self.model.search_in_materials_data = data_for_view
-            else:
-                search_words = search_text.strip().lower().split()
-                data_for_view = [
-                    item
-                    for item in self.model.current_product_materials
-                    if self._material_matches_search(item, search_words)
-                ]
-                self.model.search_in_materials_data = data_for_view
+            data_for_view = self._search_current_materials(search_text)
+            self.model.search_in_materials_data = data_for_view
 
         self._update_table(data_for_view)
 
+    def on_materials_load_progress(self, load_id: int, files_read: int, files_total: int) -> None:
+        """Shows how many specification files of the product have been read.
+
+        Args:
+            load_id: Identifier of the background load.
+            files_read: Number of files processed so far.
+            files_total: Number of files of the product.
+        """
+        if not self.model.is_current_load(load_id):
+            return
+        self.view.set_loading_status(f"Загрузка спецификаций: {files_read} из {files_total}")
+
+    def on_materials_load_partial(self, load_id: int, materials: list[dict]) -> None:
+        """Shows materials aggregated so far while the product is still loading.
+
+        Args:
+            load_id: Identifier of the background load.
+            materials: Unscaled materials of the files read so far.
+        """
+        if not self.model.is_current_load(load_id):
+            return
+        self._apply_loaded_materials(materials)
+
+    def on_materials_loaded(
+        self,
+        load_id: int,
+        product_path: str,
+        semi_finished_products: list[str],
+        materials: list[dict],
+    ) -> None:
+        """Applies the result of a background product load.
+
+        Results of loads superseded by a newer selection are ignored.
+
+        Args:
+            load_id: Identifier of the background load.
+            product_path: Path to the loaded product folder.
+            semi_finished_products: Excel files of the product.
+            materials: Unscaled aggregated materials.
+        """
+        if not self.model.is_current_load(load_id):
+            return
+        self.model.current_product_path = product_path
+        self.model.current_semi_finished_products = semi_finished_products
+        self._apply_loaded_materials(materials)
+        self.view.set_loading_status("")
+
+    def on_products_names_updated(self, added: list[list[str]], removed: list[list[str]]) -> None:
+        """Applies catalog changes to the product suggestions.
+
+        Args:
+            added: Path segments of products that appeared.
+            removed: Path segments of products that disappeared.
+        """
+        string_list_model = self.products_list_model
+        if removed:
+            # A single reset reindexes the suggestions once rather than once per removed row
+            removed_names = {" ".join(name) for name in removed}
+            names = [name for name in string_list_model.stringList() if name not in removed_names]
+            string_list_model.setStringList(names + [" ".join(name) for name in added])
+            return
+
+        # The rows arrive with their text, so the suggestions index them once
+        string_list_model.append_strings([" ".join(name) for name in added])
+        if self.is_catalog_loading and string_list_model.rowCount():
+            # Products known from the last launch can be searched while the catalog loads
+            self.is_catalog_loading = False
+            self._update_search_placeholder()
+
+    def on_catalog_scan_progress(self, products_count: int) -> None:
+        """Shows how many products have been found while the catalog is loading.
+
+        Args:
+            products_count: Number of products found so far.
+        """
+        if self.is_catalog_loading and not self.model.search_in_materials:
+            self.view.set_search_placeholder(f"Загрузка каталога: {products_count} изделий…")
+
+    def on_catalog_loaded(self) -> None:
+        """Enables product search once the catalog is loaded."""
+        self.is_catalog_loading = False
+        self._update_search_placeholder()
+
     def on_create_document_button_clicked(self) -> None:
         """Opens the document window for the selected materials."""
         if not self.model.current_product_materials:
@@ -156,18 +246,15 @@ class MainController:
             )
             return
 
-        selected_materials = [
-            item
-            for item in self.model.current_product_materials
-            if self.model.material_selection.get(item[NOM_KEY], True)
-        ]
-        if not selected_materials:
+        if not self.model.count_selected_materials():
             self.show_notification(
                 "error",
                 "Нет выбранных материалов для документа. Отметьте хотя бы один чекбокс.",
             )
             return
 
+        selected_materials = self.model.get_selected_materials()
+
         if self.document_window is None:
             self.document_window = create_document_window(
                 product_name=self.model.current_product,
@@ -191,26 +278,18 @@ class MainController:
             value: Multiplier used to scale material quantities.
         """
         self.model.norms_calculations_value = value
-        if self.model.current_semi_finished_products:
-            self.model.recalculate_current_materials()
-            if self.model.search_in_materials:
-                search_text = self.view.get_search_field_text()
-                active_filters = [key for key, val in self.search_filters.items() if val]
-                if not active_filters:
-                    data_for_view = self.model.current_product_materials
-                else:
-                    search_words = search_text.strip().lower().split()
-                    data_for_view = [
-                        item
-                        for item in self.model.current_product_materials
-                        if self._material_matches_search(item, search_words)
-                    ]
-                self.model.search_in_materials_data = data_for_view
-            else:
-                data_for_view = self.model.current_product_materials
-            self._update_table(data_for_view)
+        # Only the loaded quantities are rescaled; a load in progress applies
+        # the new multiplier to its results, so it is never restarted
+        if not self.model.base_product_materials:
+            return
+
+        self.model.recalculate_current_materials()
+        if self.model.search_in_materials:
+            data_for_view = self._search_current_materials(self.view.get_search_field_text())
+            self.model.search_in_materials_data = data_for_view
         else:
-            self.on_search_field_changed()  # Update the data in the table
+            data_for_view = self.model.current_product_materials
+        self._update_table(data_for_view)
 
     def on_completer_highlighted(self, text: str) -> None:
         """Sets a flag when a completer item is highlighted.
@@ -220,16 +299,18 @@ class MainController:
         """
         self.is_highlighting = True
 
-    def on_text_changed_for_filter(self, text: str) -> None:
-        """Updates the completer filter, ignoring changes from highlighting.
+    def on_search_text_changed(self, text: str) -> None:
+        """Schedules a search evaluation for the changed search field text.
 
         Args:
             text: Current text in the search field.
         """
         if self.is_highlighting:
+            # Highlighting a suggestion must not narrow the suggestions themselves
             self.is_highlighting = False
-            return
-        self.proxy_model.setFilterRegExp(text)
+        else:
+            self._is_filter_update_pending = True
+        self._search_timer.start()
 
     def on_search_filter_toggled(self, filter_key: str, is_checked: bool) -> None:
         """Updates search filter flags and refreshes material filtering if needed."""
@@ -260,28 +341,28 @@ class MainController:
         self.model.search_in_materials = is_checked
 
         if is_checked:  # Switched to searching in materials
+            material_names = [item[NOM_KEY] for item in self.model.current_product_materials]
+            self.materials_proxy_model.setSourceModel(KeyedStringListModel(material_names))
+            self._set_completer_proxy_model(self.materials_proxy_model)
+
             product_name = self.view.get_search_field_text()
             self.model.current_product = product_name
             self.view.clear_search_field()
+            self._run_scheduled_search()
             self.view.set_search_in_materials_checkbox_text(text=product_name)
             self.view.set_filters_button_enabled(True)
             self._update_search_placeholder()
-
-            material_names = [item[NOM_KEY] for item in self.model.current_product_materials]
-            string_list_model = QStringListModel(material_names)
-            self.proxy_model.setSourceModel(string_list_model)
         else:  # Switched back to searching for products
+            self._set_completer_proxy_model(self._get_products_completer_model())
+
             self.view.set_search_field_text(self.model.current_product)
+            self._run_scheduled_search()
             self.model.current_product = ""
             self.view.set_search_in_materials_checkbox_text(text="")
             self.view.hide_search_filters_menu()
             self.view.set_filters_button_enabled(False)
             self._update_search_placeholder()
 
-            suggestions_lst = [" ".join(name) for name in self.model.products_names]
-            string_list_model = QStringListModel(suggestions_lst)
-            self.proxy_model.setSourceModel(string_list_model)
-
         self._refresh_table()
 
     def on_row_checkbox_state_changed(self, material_name: str, is_checked: bool) -> None:
@@ -306,31 +387,119 @@ class MainController:
 
         select_all = state != Qt.Unchecked
         self.model.set_all_materials_selected(select_all)
-        self._refresh_table()
+        self.view.refresh_row_checkboxes()
+        self._update_buttons_and_header()
+
+    def on_invert_selection_requested(self) -> None:
+        """Selects the unselected materials and deselects the selected ones."""
+        if not self.model.current_product_materials:
+            return
+
+        self.model.invert_material_selection()
+        self.view.refresh_row_checkboxes()
+        self._update_buttons_and_header()
 
-    def _material_matches_search(self, item: dict, search_words: list[str]) -> bool:
-        """Checks if a material matches all search words across active filters."""
-        if not search_words:
-            return True
+    def on_material_usage_requested(self, material_name: str) -> None:
+        """Shows the products whose specifications contain a material.
 
-        fields: list[str] = []
-        if self.search_filters.get("name"):
-            fields.append(str(item.get(NOM_KEY, "")).lower())
-        if self.search_filters.get("quantity"):
-            fields.append(str(item.get(QTY_KEY, "")).lower())
-        if self.search_filters.get("unit"):
-            fields.append(str(item.get(UNIT_KEY, "")).lower())
+        Args:
+            material_name: Nomenclature of the material picked in the table.
+        """
+        usages = self.model.find_material_usage(material_name)
+        note = ""
+        if self.model.is_material_usage_updating:
+            note = "\n\nИндекс материалов ещё обновляется, список может быть неполным."
+
+        if not usages:
+            self.show_notification("info", f"Материал «{material_name}» не найден в изделиях.{note}")
+            return
 
-        if not fields:
-            return True
+        lines = [f"{product}: {quantity:g} {unit}" for product, quantity, unit in usages[:MATERIAL_USAGE_LIMIT]]
+        if len(usages) > MATERIAL_USAGE_LIMIT:
+            lines.append(f"… и ещё {len(usages) - MATERIAL_USAGE_LIMIT}")
+        self.show_notification(
+            "info",
+            f"Материал «{material_name}» используется в изделиях ({len(usages)}):\n" + "\n".join(lines) + note,
+        )
+
+    def _run_scheduled_search(self) -> None:
+        """Updates the suggestions and the table for the current search text.
+
+        Runs once per burst of keystrokes. The evaluation is skipped if the
+        text and the search mode are the same as at the previous one.
+        """
+        self._search_timer.stop()
+        search_text = self.view.get_search_field_text()
+        if self._is_filter_update_pending:
+            self._is_filter_update_pending = False
+            if self.proxy_model is self.fuzzy_results_model:
+                self.fuzzy_results_model.setStringList(self.model.search_products(search_text))
+            else:
+                self.proxy_model.set_filter_text(search_text)
+
+        search = (self.model.search_in_materials, search_text)
+        if search == self._last_search:
+            return
+        self._last_search = search
+        self.on_search_field_changed()
+
+    def _get_products_completer_model(self) -> QAbstractItemModel:
+        """Returns the model of product suggestions for the configured search mode."""
+        if self.model.product_search_mode == "fuzzy":
+            return self.fuzzy_results_model
+        return self.products_proxy_model
+
+    def _set_completer_proxy_model(self, proxy_model: QAbstractItemModel) -> None:
+        """Switches the search completer between product and material suggestions.
+
+        Args:
+            proxy_model: Model of the new suggestions.
+        """
+        self.proxy_model = proxy_model
+        self.completer.setModel(proxy_model)
 
-        return all(any(word in value for value in fields) for word in search_words)
+    def _apply_loaded_materials(self, materials: list[dict]) -> None:
+        """Stores loaded materials in the model and refreshes the table.
+
+        Args:
+            materials: Unscaled materials of the current product.
+        """
+        self.model.set_product_materials(materials, reset_selection=self.reset_selection_on_load)
+        self.reset_selection_on_load = False
+        if self.model.search_in_materials:
+            self.on_search_field_changed()
+        else:
+            self._update_table(self.model.current_product_materials)
+
+    def _search_current_materials(self, search_text: str) -> list[dict]:
+        """Filters the current product's materials by the search text and active filters.
+
+        The search keys and the quantity index are prepared once per
+        materials list and reused on every keystroke.
+
+        Args:
+            search_text: Text of the search field.
+
+        Returns:
+            Matching materials in table order.
+        """
+        materials = self.model.current_product_materials
+        if not any(self.search_filters.values()):
+            return materials
+
+        if self._material_search is None or self._material_search.materials is not materials:
+            self._material_search = MaterialSearch(materials)
+        return self._material_search.search(search_text, self.search_filters)
 
     def _update_search_placeholder(self) -> None:
         """Sets placeholder text based on mode and active filters."""
         if self.model.search_in_materials:
             active = [key for key, value in self.search_filters.items() if value]
             self.view.set_search_field_enabled(bool(active))
+        elif self.is_catalog_loading:
+            self.view.set_search_field_enabled(False)
+            self.view.set_search_placeholder("Загрузка каталога…")
+            return
         else:
             active = ["name"]
             self.view.set_search_field_enabled(True)
@@ -343,13 +512,10 @@ class MainController:
             data: Rows to display in the materials table.
         """
         self.current_table_data = data
-        any_selected = any(
-            self.model.material_selection.get(item[NOM_KEY], True) for item in data
-        )
-        self.view.update_table_widget_data(
+        self.view.update_table_data(
             data=data,
             selection=self.model.material_selection,
-            on_row_checkbox_changed=self.on_row_checkbox_state_changed,
+            selection_indices=self.model.get_material_indices(data),
         )
         self._update_buttons_and_header()
 
@@ -358,29 +524,26 @@ class MainController:
         self._update_table(self.current_table_data)
 
     def _update_buttons_and_header(self) -> None:
-        """Updates action buttons and header checkbox state based on selection."""
-        has_rows = bool(self.current_table_data)
-        any_selected = has_rows and any(
-            self.model.material_selection.get(item[NOM_KEY], True)
-            for item in self.current_table_data
-        )
+        """Updates action buttons and header checkbox state based on selection.
+
+        The counts are kept by the table model, so this does not depend on
+        the number of rows.
+        """
+        checked_count, row_count = self.view.get_table_check_counts()
+        any_selected = checked_count > 0
         self.view.update_create_document_button_state(enabled=any_selected)
         self.view.update_export_button_state(enabled=any_selected)
-        self.view.set_header_checkbox_enabled(has_rows)
-        self._update_header_checkbox_state()
+        self.view.set_header_checkbox_enabled(row_count > 0)
+        self._update_header_checkbox_state(checked_count, row_count)
 
-    def _update_header_checkbox_state(self) -> None:
-        """Sets header checkbox state based on visible rows."""
-        if not self.current_table_data:
-            self.view.set_header_checkbox_state(Qt.Unchecked)
-            return
+    def _update_header_checkbox_state(self, checked_count: int, row_count: int) -> None:
+        """Sets header checkbox state based on visible rows.
 
-        checked_count = 0
-        for item in self.current_table_data:
-            if self.model.material_selection.get(item[NOM_KEY], True):
-                checked_count += 1
-
-        if checked_count == len(self.current_table_data):
+        Args:
+            checked_count: Number of checked rows.
+            row_count: Number of rows in the table.
+        """
+        if row_count and checked_count == row_count:
             state = Qt.Checked
         elif checked_count == 0:
             state = Qt.Unchecked
@@ -389,9 +552,12 @@ class MainController:
 
         self.view.set_header_checkbox_state(state)
 
-    def _check_program_version(self) -> None:
-        """Checks the program version and prompts for updates if necessary."""
-        is_version_ok = self.model.check_program_version()
+    def on_program_version_checked(self, is_version_ok: Optional[bool]) -> None:
+        """Prompts for updates if the background version check requires it.
+
+        Args:
+            is_version_ok: Result of ``MainModel.check_program_version``.
+        """
 
         # An error occurred during the version check
         if is_version_ok is None:
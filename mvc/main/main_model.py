@@ -1,20 +1,42 @@
+import logging
 import os
 import subprocess
+import threading
+import time
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 
-import pandas as pd
+import numpy as np
 import yaml
 from openpyxl import load_workbook
 from openpyxl.styles import Alignment, Border, Font, Side
 from PyQt5.QtCore import QObject, pyqtSignal
 
+from classes import CatalogIndex, CatalogWatcher, MaterialAggregate, MaterialUsageIndex, SpecificationCache
+from utils.materials import aggregate_materials, build_materials_frame, materials_to_records
+from utils.search_index import FuzzyIndex
+from utils.spec_readers import DEFAULT_SPEC_READER, SPEC_READERS, SpecRow, read_specification
+
+logger = logging.getLogger(__name__)
+
+# Ways to match the search text against product names
+PRODUCT_SEARCH_MODES = ("substring", "fuzzy")
+
 # Column keys in the source Excel files
 NOM_KEY = "Номенклатура"
 QTY_KEY = "Количество"
 UNIT_KEY = "Ед. изм."
 RMP_KEY = "РМП"
 
+# Minimal delay between partial results emitted while a product is loading, in seconds
+PARTIAL_RESULTS_INTERVAL = 0.3
+
+# The background material usage pass idles this many times as long as it
+# spent reading each product, leaving the GIL to the GUI thread meanwhile
+MATERIAL_USAGE_IDLE_RATIO = 1.0
+
 
 class MainModel(QObject):
     """Manages the application's data and business logic.
@@ -25,141 +47,218 @@ class MainModel(QObject):
 
     Attributes:
         show_notification: A signal that emits messages to be displayed to the user.
+        materials_load_progress: Signal with (load id, files read, files total)
+            emitted while a product is loading in the background.
+        materials_load_partial: Signal with (load id, materials aggregated so far).
+        materials_loaded: Signal with (load id, product path, semi-finished
+            product files, materials) emitted when a background load completes.
+        products_names_updated: Signal with (added products, removed
+            products) emitted when a background catalog refresh changes the
+            products list.
+        catalog_directories_changed: Signal with the full paths of all
+            catalog folders, emitted after every catalog refresh.
+        catalog_scan_progress: Signal with the number of products found so
+            far while the catalog is loading.
+        catalog_loaded: Signal emitted when the catalog has been loaded at startup.
+        program_version_checked: Signal with the result of
+            ``check_program_version`` run in the background.
     """
 
     show_notification = pyqtSignal(str, str)
+    materials_load_progress = pyqtSignal(int, int, int)
+    materials_load_partial = pyqtSignal(int, list)
+    materials_loaded = pyqtSignal(int, str, list, list)
+    products_names_updated = pyqtSignal(list, list)
+    catalog_directories_changed = pyqtSignal(list)
+    catalog_scan_progress = pyqtSignal(int)
+    catalog_loaded = pyqtSignal()
+    program_version_checked = pyqtSignal(object)
 
     def __init__(self) -> None:
-        """Initializes the model and loads configuration/state."""
+        """Initializes the model and loads configuration/state.
+
+        Only the configuration is read here. The catalog index and the
+        material usage index are opened by ``load_catalog_in_thread``, after
+        the window is shown.
+        """
         super().__init__()
+        started = time.perf_counter()
         self.program_version_number: str = ""
         self.program_server_path: str = ""
         self.path_to_products_folder: str = ""
         self.is_products_folder_available: bool = False
+        self.spec_cache: Optional[SpecificationCache] = None
+        self.catalog_index: Optional[CatalogIndex] = None
+        self.catalog_watcher: Optional[CatalogWatcher] = None
+        self.catalog_watch_mode: str = "auto"
+        self.catalog_poll_interval_sec: int = 60
+        # A single worker keeps catalog updates in order
+        self._catalog_executor = ThreadPoolExecutor(max_workers=1)
+        self.spec_reader_backend: str = DEFAULT_SPEC_READER
+        self.spec_reader_workers: int = 0
+        self.search_debounce_ms: int = 150
+        self.product_search_mode: str = "substring"
+        self.fuzzy_search_top_k: int = 50
+        self._spec_executor: Optional[ProcessPoolExecutor] = None
+        self._spec_executor_lock = threading.Lock()
+        self._load_id: int = 0
+        self._load_cancel_event: Optional[threading.Event] = None
+        # Aggregate of the last loaded product, reused to reload only changed files
+        self._material_aggregate: Optional[Tuple[str, MaterialAggregate]] = None
+        # Reverse index of materials, updated by a background thread after catalog refreshes
+        self.material_usage_index: Optional[MaterialUsageIndex] = None
+        self._material_usage_index_path: Optional[str] = None
+        self._is_spec_cache_clear_requested: bool = False
+        # If set, the background pass only refreshes products that have been opened
+        self.material_usage_opened_only: bool = False
+        self._usage_update_lock = threading.Lock()
+        self._is_usage_update_running: bool = False
+        self._is_usage_update_pending: bool = False
+        # Set by ``shutdown`` to stop background work before the stores are closed
+        self._shutdown_event = threading.Event()
         self._load_config()
 
+        # Products of the catalog; those known from the previous launch are
+        # loaded in the background by ``load_catalog_in_thread``
         self.products_names: List[List[str]] = []
-        self.update_products_names()
+        # Display name -> path segments of the product, and the reverse
+        self.products_by_name: Dict[str, Tuple[str, ...]] = {}
+        self.product_names_by_path: Dict[Tuple[str, ...], str] = {}
+        # Fuzzy index of the products, built on the first fuzzy search and
+        # rebuilt once the products change; keyed by the dictionary it was built from
+        self._fuzzy_index: Optional[Tuple[Dict[Tuple[str, ...], str], List[str], FuzzyIndex]] = None
+        # Watching every catalog folder is slow on large trees, so it starts
+        # only after the window is shown and the catalog is loaded
+        self.catalog_loaded.connect(self._start_catalog_watcher)
 
         self.current_product: str = ""
         self.current_product_path: str = ""
         self.current_semi_finished_products: List[str] = []
+        self.base_product_materials: List[Dict] = []
+        self._base_quantities: np.ndarray = np.empty(0, dtype=float)
         self.current_product_materials: List[Dict] = []
-        self.material_selection: Dict[str, bool] = {}
+        # Selection flag of every material, in the order of ``current_product_materials``
+        self.material_selection: np.ndarray = np.ones(0, dtype=bool)
+        # Material name -> position in ``current_product_materials``, for lookups by name
+        self._material_indices: Dict[str, int] = {}
         self.norms_calculations_value: int = 1
         self.search_in_materials: bool = False
         self.search_in_materials_data: List[Dict] = []
+        logger.info("Main model initialized in %.3f s", time.perf_counter() - started)
+
+    def load_product_in_thread(self, product_name: tuple) -> int:
+        """Starts loading a product's materials in a background thread.
 
-    def get_semi_finished_products(self, product_name: tuple) -> List[str]:
-        """Collects Excel files for the selected product.
+        Any load that is still running is cancelled, so its results are never
+        emitted. Progress, partial results and the final result are reported
+        through the ``materials_load_*`` and ``materials_loaded`` signals.
 
         Args:
             product_name: Tuple of path segments that identify the product.
 
         Returns:
-            List of Excel file paths, including files inside the RMP subfolder.
+            Identifier of the started load, attached to every emitted signal.
         """
+        self.cancel_product_loading()
+
+        self._load_id += 1
+        cancel_event = threading.Event()
+        self._load_cancel_event = cancel_event
+        product_path = os.path.join(self.path_to_products_folder, *product_name)
+
+        thread = threading.Thread(
+            target=self._load_product_materials,
+            args=(self._load_id, product_path, cancel_event),
+        )
+        thread.daemon = True
+        thread.start()
+        return self._load_id
+
+    def cancel_product_loading(self) -> None:
+        """Cancels the background product load, if one is running."""
+        if self._load_cancel_event is not None:
+            self._load_cancel_event.set()
+            self._load_cancel_event = None
+
+    def is_current_load(self, load_id: int) -> bool:
+        """Checks whether a load is the latest one and has not been cancelled.
 
-        def add_file(file_path: str, file_list: List[str]) -> None:
-            if os.path.isfile(file_path) and file_path.lower().endswith((".xlsx", ".xls")):
-                file_list.append(file_path)
+        Args:
+            load_id: Identifier returned by ``load_product_in_thread``.
 
-        semi_finished_products: List[str] = []
-        try:
-            product_path = os.path.join(self.path_to_products_folder, *product_name)
-            if os.path.exists(product_path) and os.path.isdir(product_path):
-                self.current_product_path = product_path
-                for item_name in os.listdir(product_path):
-                    item_path = os.path.join(product_path, item_name)
-                    if item_name.lower() == "рмп" and os.path.isdir(item_path):
-                        for rmp_file_name in os.listdir(item_path):
-                            add_file(os.path.join(item_path, rmp_file_name), semi_finished_products)
-                    else:
-                        add_file(item_path, semi_finished_products)
-            self.current_semi_finished_products = semi_finished_products
-            return semi_finished_products
-        except Exception as e:
-            self.current_semi_finished_products = []
-            self.show_notification.emit(
-                "error", 
-                f"Произошла ошибка в процессе объединения полуфабрикатов {e}"
-                )
-            
-            return []
+        Returns:
+            True if results of this load should be applied.
+        """
+        return load_id == self._load_id and self._load_cancel_event is not None
 
-    def get_product_materials(self, semi_finished_products: List[str]) -> List[Dict]:
-        """Aggregates materials from semi-finished product workbooks.
+    def set_product_materials(self, materials: List[Dict], reset_selection: bool) -> List[Dict]:
+        """Stores the unscaled materials of the current product.
 
         Args:
-            semi_finished_products: Paths to Excel files that describe semi-finished items.
+            materials: Aggregated materials as emitted by ``materials_loaded``.
+            reset_selection: If True, all materials become selected.
 
         Returns:
-            Deduplicated materials list with merged quantities and RMP markers.
+            Materials scaled by the current norms multiplier.
         """
-        product_materials_dict: Dict[str, Dict] = {}
-        semi_product_names = [
-            os.path.splitext(os.path.basename(p))[0].lower().strip() for p in semi_finished_products
-        ]
+        self.base_product_materials = materials
+        self._base_quantities = np.fromiter(
+            (item[QTY_KEY] for item in materials), dtype=float, count=len(materials)
+        )
+        self.sync_material_selection(materials, reset=reset_selection)
+        return self.recalculate_current_materials()
 
-        for file_path in semi_finished_products:
-            if not os.path.exists(file_path):
-                self.show_notification.emit("error", f"Файл не найден.\nПуть: {file_path}")
-                continue
+    def recalculate_current_materials(self) -> List[Dict]:
+        """Applies the norms multiplier to the stored unscaled materials.
 
-            try:
-                is_rmp = os.path.basename(os.path.dirname(file_path)).lower() == "рмп"
-                df = pd.read_excel(file_path, sheet_name="TDSheet")
-                df = self._normalize_material_columns(df)
-                df = df.dropna(subset=[NOM_KEY]).fillna("")
-
-                for item in df.to_dict("records"):
-                    nomenclature = item[NOM_KEY]
-                    if nomenclature.lower().strip() in semi_product_names:
-                        continue
-
-                    quantity = item[QTY_KEY] / 1000
-                    if self.norms_calculations_value != 1:
-                        quantity *= self.norms_calculations_value
-                    item[QTY_KEY] = quantity
-                    item[RMP_KEY] = is_rmp
-
-                    if nomenclature in product_materials_dict:
-                        product_materials_dict[nomenclature][QTY_KEY] += quantity
-                    else:
-                        product_materials_dict[nomenclature] = item
+        No files are read; the quantities are scaled in a single vectorized
+        multiplication.
 
-            except Exception as e:
-                self.show_notification.emit(
-                    "error", 
-                    f"Произошла ошибка в процессе чтения файла: {os.path.basename(file_path)}: {e}"
-                    )
+        Returns:
+            Materials scaled by the current norms multiplier.
+        """
+        quantities = self._base_quantities * self.norms_calculations_value
+        self.current_product_materials = [
+            {**item, QTY_KEY: quantity}
+            for item, quantity in zip(self.base_product_materials, quantities.tolist())
+        ]
+        return self.current_product_materials
 
-        return list(product_materials_dict.values())
+    def sync_material_selection(self, materials: List[Dict], reset: bool = False) -> None:
+        """Aligns the selection with a new materials list.
 
-    def recalculate_current_materials(self) -> List[Dict]:
-        """Recalculates materials for the current product using the stored semi-finished list."""
-        if not self.current_semi_finished_products:
-            self.current_product_materials = []
-            self.sync_material_selection([], reset=True)
-            return []
+        Materials that were already listed keep their state; new ones are
+        selected.
 
-        product_materials = self.get_product_materials(self.current_semi_finished_products)
-        self.current_product_materials = product_materials
-        self.sync_material_selection(product_materials, reset=False)
-        return product_materials
+        Args:
+            materials: Materials in their new order.
+            reset: If True, default all to selected.
+        """
+        names = [item[NOM_KEY] for item in materials]
+        selection = np.ones(len(names), dtype=bool)
+        if not reset and len(self.material_selection):
+            previous_indices = np.fromiter(
+                (self._material_indices.get(name, -1) for name in names), dtype=np.int64, count=len(names)
+            )
+            is_known = previous_indices >= 0
+            selection[is_known] = self.material_selection[previous_indices[is_known]]
 
-    def sync_material_selection(self, materials: List[Dict], reset: bool = False) -> None:
-        """Syncs selection map with current materials list.
+        self.material_selection = selection
+        self._material_indices = {name: index for index, name in enumerate(names)}
+
+    def get_material_indices(self, materials: List[Dict]) -> np.ndarray:
+        """Finds the positions of materials in ``current_product_materials``.
 
         Args:
-            materials: Materials currently displayed.
-            reset: If True, default all to selected.
+            materials: Materials of the current product, e.g. search results.
+
+        Returns:
+            Position of every material, or -1 for unknown materials.
         """
-        new_selection: Dict[str, bool] = {}
-        for item in materials:
-            name = item[NOM_KEY]
-            new_selection[name] = True if reset or name not in self.material_selection else self.material_selection[name]
-        self.material_selection = new_selection
+        indices = self._material_indices
+        return np.fromiter(
+            (indices.get(item[NOM_KEY], -1) for item in materials), dtype=np.int64, count=len(materials)
+        )
 
     def set_material_selected(self, name: str, is_selected: bool) -> None:
         """Sets selection state for a single material.
@@ -168,8 +267,9 @@ class MainModel(QObject):
             name: Material name used as the selection key.
             is_selected: Desired selection state.
         """
-        if name in self.material_selection:
-            self.material_selection[name] = is_selected
+        index = self._material_indices.get(name)
+        if index is not None:
+            self.material_selection[index] = is_selected
 
     def set_all_materials_selected(self, is_selected: bool) -> None:
         """Sets selection state for all materials.
@@ -177,8 +277,20 @@ class MainModel(QObject):
         Args:
             is_selected: Desired selection state applied to every material.
         """
-        for key in list(self.material_selection.keys()):
-            self.material_selection[key] = is_selected
+        self.material_selection[:] = is_selected
+
+    def invert_material_selection(self) -> None:
+        """Selects the unselected materials and deselects the selected ones."""
+        np.logical_not(self.material_selection, out=self.material_selection)
+
+    def count_selected_materials(self) -> int:
+        """Returns the number of selected materials."""
+        return int(np.count_nonzero(self.material_selection))
+
+    def get_selected_materials(self) -> List[Dict]:
+        """Returns the selected materials of the current product in table order."""
+        materials = self.current_product_materials
+        return [materials[index] for index in np.flatnonzero(self.material_selection).tolist()]
 
     def get_desktop_path(self) -> Optional[Path]:
         """Resolves a Desktop path, handling OneDrive RU/EN variants.
@@ -226,29 +338,176 @@ class MainModel(QObject):
                     continue
         return False
 
-    def update_products_names(self) -> None:
-        """Refreshes the products list by scanning the configured folder."""
-        if not self.is_products_folder_available:
-            self.products_names = []
+    def check_program_version_in_thread(self) -> None:
+        """Checks the program version in a background thread.
+
+        The result is reported through ``program_version_checked``.
+        """
+        thread = threading.Thread(target=self._check_program_version_in_background)
+        thread.daemon = True
+        thread.start()
+
+    def update_products_names(
+        self,
+        directories: Optional[List[str]] = None,
+        on_progress: Optional[Callable[[int], None]] = None,
+    ) -> Tuple[List[List[str]], List[List[str]]]:
+        """Refreshes the products list by revalidating the catalog index.
+
+        Args:
+            directories: Full paths of folders that changed; by default the
+                whole catalog is revalidated.
+            on_progress: Called with the number of products found so far.
+
+        Returns:
+            Products that were added and products that were removed.
+        """
+        if not self.is_products_folder_available or self.catalog_index is None:
+            self._set_products_names([])
             self.show_notification.emit("error", "Папка изделий недоступна")
-            return
+            return [], []
+
+        relative_paths = None
+        if directories is not None:
+            relative_paths = [
+                relative_path
+                for relative_path in map(self.catalog_index.get_relative_path, directories)
+                if relative_path is not None
+            ]
 
-        products: List[List[str]] = []
         try:
-            for root, dirs, _ in os.walk(self.path_to_products_folder):
-                lower_dirs = [d.lower() for d in dirs]
-                if "рмп" in lower_dirs:
-                    dirs.remove(dirs[lower_dirs.index("рмп")])
-                if not dirs:
-                    relative_path = os.path.relpath(root, self.path_to_products_folder)
-                    if relative_path != ".":
-                        products.append(relative_path.split(os.sep))
-            self.products_names = products
+            added, removed = self.catalog_index.refresh(relative_paths, on_progress)
         except Exception as e:
             self.show_notification.emit(
                 "error", 
                 f"Произошла ошибка в процесее сканирования продуктов{e}"
                 )
+            return [], []
+
+        if added or removed or not self.products_names:
+            self._set_products_names(self.catalog_index.get_products())
+        return added, removed
+
+    def find_product(self, display_name: str) -> Optional[Tuple[str, ...]]:
+        """Finds a product by the name shown in the search field.
+
+        Args:
+            display_name: Path segments of the product joined with spaces.
+
+        Returns:
+            Path segments of the product, or ``None`` if there is no such product.
+        """
+        return self.products_by_name.get(display_name)
+
+    def search_products(self, query: str) -> List[str]:
+        """Ranks products by similarity to a query, tolerating typos.
+
+        Args:
+            query: Text of the search field.
+
+        Returns:
+            Display names of at most ``fuzzy_search_top_k`` best matching
+            products, best first.
+        """
+        product_names_by_path = self.product_names_by_path
+        fuzzy_index = self._fuzzy_index
+        if fuzzy_index is None or fuzzy_index[0] is not product_names_by_path:
+            paths = list(product_names_by_path)
+            names = [product_names_by_path[path] for path in paths]
+            fuzzy_index = (product_names_by_path, names, FuzzyIndex(names, depths=[len(path) for path in paths]))
+            self._fuzzy_index = fuzzy_index
+
+        _, names, index = fuzzy_index
+        return [names[text_id] for text_id in index.search(query, self.fuzzy_search_top_k)]
+
+    def find_material_usage(self, nomenclature: str) -> List[Tuple[str, float, str]]:
+        """Finds the products whose specifications contain a material.
+
+        Only products already recorded in the material usage index are
+        searched; the index is completed in the background.
+
+        Args:
+            nomenclature: Name of the material.
+
+        Returns:
+            (product display name, per-unit quantity, unit) for every product
+            using the material.
+        """
+        if self.material_usage_index is None:
+            return []
+
+        try:
+            usages = self.material_usage_index.find_products(nomenclature)
+        except Exception as e:
+            self.show_notification.emit("error", f"Не удалось прочитать индекс материалов: {e}")
+            return []
+        return [(" ".join(product.split("/")), quantity, unit) for product, quantity, unit in usages]
+
+    @property
+    def is_material_usage_updating(self) -> bool:
+        """Whether the material usage index is being updated in the background."""
+        return self._is_usage_update_running
+
+    def update_material_usage_in_thread(self) -> None:
+        """Brings the material usage index up to date with the catalog in a background thread.
+
+        If an update is already running, one more pass is made after it, so
+        changes made meanwhile are never missed.
+        """
+        if self.material_usage_index is None or self.catalog_index is None:
+            return
+
+        with self._usage_update_lock:
+            self._is_usage_update_pending = True
+            if self._is_usage_update_running:
+                return
+            self._is_usage_update_running = True
+
+        thread = threading.Thread(target=self._update_material_usage_in_background)
+        thread.daemon = True
+        thread.start()
+
+    def load_catalog_in_thread(self) -> None:
+        """Loads the products catalog in the background at startup.
+
+        The products list is revalidated against the products folder,
+        ``catalog_scan_progress`` reports the products found so far and
+        ``catalog_loaded`` is emitted at the end.
+        """
+        self._catalog_executor.submit(self._load_catalog_in_background)
+
+    def update_products_names_in_thread(self, directories: Optional[List[str]] = None) -> None:
+        """Refreshes the products list in a background thread.
+
+        ``products_names_updated`` is emitted if the list changed.
+
+        Args:
+            directories: Full paths of folders that changed; by default the
+                whole catalog is revalidated.
+        """
+        self._catalog_executor.submit(self._update_products_names_and_notify, directories)
+
+    def shutdown(self) -> None:
+        """Stops background work and closes the local caches and indexes.
+
+        Called once when the application exits.
+        """
+        self._shutdown_event.set()
+        self.cancel_product_loading()
+        if self.catalog_watcher is not None:
+            self.catalog_watcher.blockSignals(True)  # No refreshes are scheduled from now on
+        self._catalog_executor.shutdown(wait=False, cancel_futures=True)
+        with self._spec_executor_lock:
+            if self._spec_executor is not None:
+                self._spec_executor.shutdown(wait=False, cancel_futures=True)
+                self._spec_executor = None
+
+        for store in (self.spec_cache, self.material_usage_index):
+            if store is not None:
+                try:
+                    store.close()
+                except Exception:
+                    pass  # The process is exiting; nothing is left to report to
 
     def update_program(self) -> None:
         """Launches the updater executable with admin rights."""
@@ -296,9 +555,7 @@ class MainModel(QObject):
             sheet = workbook.active
             sheet.title = self._sanitize_sheet_title("Материалы")
 
-            selected_data = [
-                item for item in self.current_product_materials if self.material_selection.get(item[NOM_KEY], True)
-            ]
+            selected_data = self.get_selected_materials()
             if not selected_data:
                 self.show_notification.emit("warning", "Нет данных для экспорта.")
                 return
@@ -383,51 +640,537 @@ class MainModel(QObject):
 
         self.program_version_number = config.get("program_version_number", "")
         self.program_server_path = config.get("server_program_path", "")
+        self.spec_reader_workers = int(config.get("spec_reader_workers", 0) or 0)
+        self.search_debounce_ms = int(config.get("search_debounce_ms", 150))
+        self.fuzzy_search_top_k = max(1, int(config.get("fuzzy_search_top_k", 50)))
+        search_mode = config.get("product_search_mode") or "substring"
+        if search_mode in PRODUCT_SEARCH_MODES:
+            self.product_search_mode = search_mode
+        else:
+            self.show_notification.emit(
+                "error",
+                f"Неизвестный режим поиска изделий: {search_mode}. Используется поиск по вхождению.",
+            )
+        backend = config.get("spec_reader_backend") or DEFAULT_SPEC_READER
+        if backend in SPEC_READERS:
+            self.spec_reader_backend = backend
+        else:
+            self.show_notification.emit(
+                "error",
+                f"Неизвестный способ чтения спецификаций: {backend}. Используется {DEFAULT_SPEC_READER}.",
+            )
+        self._load_spec_cache(config)
+        self._load_material_usage_index(config)
 
         path = config["path_to_products_folder"]
         if os.path.exists(path) and os.path.isdir(path):
             self.path_to_products_folder = path
             self.is_products_folder_available = True
+            self.catalog_watch_mode = config.get("catalog_watch_mode", "auto")
+            self.catalog_poll_interval_sec = config.get("catalog_poll_interval_sec", 60)
+            index_path = config.get("catalog_index_path") or os.path.join("cache", "catalog_index.json")
+            self.catalog_index = CatalogIndex(
+                index_path=index_path,
+                root_path=path,
+                scan_workers=config.get("catalog_scan_workers", 8),
+            )
         else:
             self.show_notification.emit("error", "Путь к папке с продуктами недоступен.")
             self.is_products_folder_available = False
 
-    def _normalize_material_columns(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Renames material columns to standard keys using substring matching.
+    def _list_semi_finished_products(self, product_path: str) -> List[str]:
+        """Lists Excel files of a product folder, including its RMP subfolder.
+
+        The listing recorded in the catalog index is used while the product
+        folders are unchanged; otherwise the product is reindexed first.
+
+        Args:
+            product_path: Full path to the product folder.
+
+        Returns:
+            Excel file paths; empty if the folder does not exist.
+        """
+        if self.catalog_index is not None:
+            relative_path = self.catalog_index.get_relative_path(product_path)
+            if relative_path:
+                product_files = self.catalog_index.get_product_files(relative_path)
+                if product_files is None:
+                    # Reindexed in the catalog worker, so catalog updates are applied in order
+                    try:
+                        self._catalog_executor.submit(self._update_products_names_and_notify, [product_path]).result()
+                    except (CancelledError, RuntimeError):
+                        pass  # Shutting down; the folder is listed directly below
+                    product_files = self.catalog_index.get_product_files(relative_path)
+                if product_files is not None:
+                    return product_files
+
+        def add_file(file_path: str, file_list: List[str]) -> None:
+            if os.path.isfile(file_path) and file_path.lower().endswith((".xlsx", ".xls")):
+                file_list.append(file_path)
+
+        semi_finished_products: List[str] = []
+        if os.path.exists(product_path) and os.path.isdir(product_path):
+            for item_name in os.listdir(product_path):
+                item_path = os.path.join(product_path, item_name)
+                if item_name.lower() == "рмп" and os.path.isdir(item_path):
+                    for rmp_file_name in os.listdir(item_path):
+                        add_file(os.path.join(item_path, rmp_file_name), semi_finished_products)
+                else:
+                    add_file(item_path, semi_finished_products)
+        return semi_finished_products
+
+    def _set_products_names(self, products: List[List[str]]) -> None:
+        """Replaces the products list together with its lookup dictionaries.
+
+        The dictionaries are built aside and swapped in, so the UI thread
+        never sees them half updated.
+
+        Args:
+            products: Path segments of every product.
+        """
+        products_by_name: Dict[str, Tuple[str, ...]] = {}
+        product_names_by_path: Dict[Tuple[str, ...], str] = {}
+        for product in products:
+            path = tuple(product)
+            display_name = " ".join(path)
+            products_by_name.setdefault(display_name, path)  # The first product wins, as in the list
+            product_names_by_path[path] = display_name
+
+        self.products_by_name = products_by_name
+        self.product_names_by_path = product_names_by_path
+        self.products_names = products
+
+    def _check_program_version_in_background(self) -> None:
+        """Checks the program version; runs in a background thread.
+
+        ``program_version_checked`` is always emitted, with ``None`` if the
+        server folder cannot be read.
+        """
+        try:
+            is_up_to_date = self.check_program_version()
+        except Exception as e:
+            logger.warning("Program version check failed: %s", e)
+            is_up_to_date = None
+        self.program_version_checked.emit(is_up_to_date)
+
+    def _load_catalog_in_background(self) -> None:
+        """Loads the products catalog; runs in the catalog worker thread."""
+        self._open_local_stores()
+        self._update_products_names_and_notify(on_progress=self.catalog_scan_progress.emit)
+        self.catalog_loaded.emit()
+
+    def _update_products_names_and_notify(
+        self, directories: Optional[List[str]] = None, on_progress: Optional[Callable[[int], None]] = None
+    ) -> None:
+        """Refreshes the products list and reports changes through signals.
+
+        Args:
+            directories: Full paths of folders that changed, or ``None``.
+            on_progress: Called with the number of products found so far.
+        """
+        added, removed = self.update_products_names(directories, on_progress)
+        if added or removed:
+            self.products_names_updated.emit(added, removed)
+        if self.catalog_index is not None:
+            # Folders may appear without new products, e.g. an RMP subfolder
+            self.catalog_directories_changed.emit(self.catalog_index.get_directories())
+        self.update_material_usage_in_thread()
+
+    def _start_catalog_watcher(self) -> None:
+        """Starts reporting changed catalog folders for incremental updates."""
+        if self.catalog_index is None or self.catalog_watch_mode == "off" or self.catalog_watcher is not None:
+            return
+
+        self.catalog_watcher = CatalogWatcher(
+            root_path=self.path_to_products_folder,
+            mode=self.catalog_watch_mode,
+            poll_interval_sec=self.catalog_poll_interval_sec,
+            parent=self,
+        )
+        self.catalog_watcher.directories_changed.connect(self.update_products_names_in_thread)
+        self.catalog_directories_changed.connect(self.catalog_watcher.set_directories)
+        self.catalog_watcher.set_directories(self.catalog_index.get_directories())
+
+    def _load_product_materials(self, load_id: int, product_path: str, cancel_event: threading.Event) -> None:
+        """Loads a product's materials; runs in a background thread.
+
+        Args:
+            load_id: Identifier of this load, attached to emitted signals.
+            product_path: Full path to the product folder.
+            cancel_event: Set when a newer load supersedes this one.
+        """
+        try:
+            semi_finished_products = self._list_semi_finished_products(product_path)
+        except Exception as e:
+            self.show_notification.emit(
+                "error", 
+                f"Произошла ошибка в процессе объединения полуфабрикатов {e}"
+                )
+            semi_finished_products = []
+
+        last_partial_time = time.monotonic()
+
+        def on_progress(files_read: int, files_total: int, get_partial: Callable[[], List[Dict]]) -> None:
+            nonlocal last_partial_time
+            self.materials_load_progress.emit(load_id, files_read, files_total)
+            if files_read < files_total and time.monotonic() - last_partial_time >= PARTIAL_RESULTS_INTERVAL:
+                self.materials_load_partial.emit(load_id, get_partial())
+                last_partial_time = time.monotonic()
+
+        previous = None
+        if self._material_aggregate is not None and self._material_aggregate[0] == product_path:
+            previous = self._material_aggregate[1]
+
+        aggregate = self._build_material_aggregate(semi_finished_products, cancel_event, on_progress, previous)
+        if aggregate is None or cancel_event.is_set():
+            return
+
+        self._material_aggregate = (product_path, aggregate)
+        materials = aggregate.get_materials(semi_finished_products)
+        self._record_material_usage(product_path, aggregate.signatures, materials)
+        self.materials_loaded.emit(load_id, product_path, semi_finished_products, materials)
+
+    def _build_material_aggregate(
+        self,
+        semi_finished_products: List[str],
+        cancel_event: Optional[threading.Event] = None,
+        on_progress: Optional[Callable[[int, int, Callable[[], List[Dict]]], None]] = None,
+        previous: Optional[MaterialAggregate] = None,
+    ) -> Optional[MaterialAggregate]:
+        """Reads a product's workbooks into a material aggregate.
+
+        With a previous aggregate of the same product, only files whose size
+        or modification time changed are read: their contributions are
+        replaced, deleted files are dropped, and the totals they affect are
+        recomputed from the per-file contributions.
 
         Args:
-            df: Raw DataFrame read from a materials workbook.
+            semi_finished_products: Paths to Excel files of the product.
+            cancel_event: Stops reading further files once set.
+            on_progress: Called after each file with the number of files read,
+                the total number of files and a function returning the
+                materials aggregated so far.
+            previous: Aggregate of an earlier load of the same product.
 
         Returns:
-            DataFrame with normalized column names.
+            The up-to-date aggregate, or ``None`` if the load was cancelled.
+        """
+        aggregate = previous.copy() if previous is not None else None
+        signatures: Dict[str, Tuple[int, int]] = {}
+        files_to_read = semi_finished_products
+
+        if aggregate is not None:
+            product_files = set(semi_finished_products)
+            for file_path in aggregate.files:
+                if file_path not in product_files:
+                    aggregate.remove_file(file_path)
+
+            files_to_read = []
+            for file_path in semi_finished_products:
+                try:
+                    signatures[file_path] = SpecificationCache.get_file_signature(file_path)
+                except OSError:
+                    files_to_read.append(file_path)  # Reported when the file is read
+                    continue
+                if aggregate.signatures.get(file_path) != signatures[file_path]:
+                    files_to_read.append(file_path)
+
+        files: List[Tuple[str, Tuple[int, int], List[SpecRow]]] = []
+
+        def get_partial() -> List[Dict]:
+            if aggregate is not None:
+                return aggregate.get_materials(semi_finished_products)
+            return self._aggregate_product_materials([rows for _, _, rows in files], semi_finished_products)
+
+        specifications = self._read_specifications(files_to_read, signatures)
+        try:
+            for files_read, (file_path, signature, rows, error) in enumerate(specifications, start=1):
+                if cancel_event is not None and cancel_event.is_set():
+                    return None
+
+                if isinstance(error, FileNotFoundError):
+                    self.show_notification.emit("error", f"Файл не найден.\nПуть: {file_path}")
+                elif error is not None:
+                    self.show_notification.emit(
+                        "error", 
+                        f"Произошла ошибка в процессе чтения файла: {os.path.basename(file_path)}: {error}"
+                        )
+
+                if aggregate is None:
+                    if error is None:
+                        files.append((file_path, signature, rows))
+                elif error is None:
+                    aggregate.update_file(file_path, signature, rows)
+                else:
+                    aggregate.remove_file(file_path)
+
+                if on_progress is not None:
+                    on_progress(files_read, len(files_to_read), get_partial)
+        finally:
+            specifications.close()
+
+        return aggregate if aggregate is not None else MaterialAggregate.build(files)
+
+    def _aggregate_product_materials(
+        self, rows_per_file: List[List[SpecRow]], semi_finished_products: List[str]
+    ) -> List[Dict]:
+        """Merges rows of a product's files into the deduplicated materials list.
+
+        Args:
+            rows_per_file: Normalized rows of each file that was read.
+            semi_finished_products: All Excel files of the product; their names
+                are excluded from the materials.
 
-        Raises:
-            ValueError: If required columns cannot be located.
+        Returns:
+            Aggregated materials, unscaled by the norms multiplier.
         """
-        columns_lower = {col: str(col).lower() for col in df.columns}
+        semi_product_names = [
+            os.path.splitext(os.path.basename(p))[0].lower().strip() for p in semi_finished_products
+        ]
+        materials = aggregate_materials(build_materials_frame(rows_per_file), semi_product_names)
+        return materials_to_records(materials)
 
-        def find_column(substrings: List[str]) -> Optional[str]:
-            for col, low in columns_lower.items():
-                if all(sub in low for sub in substrings):
-                    return col
-            return None
+    def _load_spec_cache(self, config: Dict) -> None:
+        """Opens the local specification cache described by the configuration.
 
-        mapping: Dict[str, str] = {}
-        candidates = {
-            NOM_KEY: ["номенк"],
-            QTY_KEY: ["кол"],
-            UNIT_KEY: ["ед", "изм"],
-        }
+        Args:
+            config: Parsed contents of config.yaml.
+        """
+        if not config.get("spec_cache_enabled", True):
+            return
 
-        for target, substrings in candidates.items():
-            col = find_column(substrings)
-            if col:
-                mapping[col] = target
+        cache_path = config.get("spec_cache_path") or os.path.join("cache", "specifications.sqlite")
+        try:
+            self.spec_cache = SpecificationCache(
+                db_path=cache_path,
+                max_size_mb=config.get("spec_cache_max_size_mb", 256),
+                reader=self.spec_reader_backend,
+            )
+            # Clearing ends with a VACUUM, so it is done in the background
+            self._is_spec_cache_clear_requested = bool(config.get("spec_cache_clear_on_start", False))
+        except Exception as e:
+            self.spec_cache = None
+            self.show_notification.emit("error", f"Не удалось открыть кэш спецификаций: {e}")
+
+    def _load_material_usage_index(self, config: Dict) -> None:
+        """Reads the material usage index settings; the index is opened by ``_open_local_stores``.
+
+        Args:
+            config: Parsed contents of config.yaml.
+        """
+        if not config.get("material_usage_index_enabled", True):
+            return
+
+        self.material_usage_opened_only = bool(config.get("material_usage_index_opened_only", False))
+        self._material_usage_index_path = (
+            config.get("material_usage_index_path") or os.path.join("cache", "material_usage.sqlite")
+        )
+
+    def _open_local_stores(self) -> None:
+        """Opens the local indexes and clears the cache if requested; runs in the catalog worker thread.
+
+        Products known from the previous launch are reported through
+        ``products_names_updated`` as soon as the catalog index is read.
+        """
+        started = time.perf_counter()
+        if self.spec_cache is not None and self._is_spec_cache_clear_requested:
+            try:
+                self.spec_cache.clear()
+            except Exception as e:
+                self.show_notification.emit("error", f"Не удалось очистить кэш спецификаций: {e}")
+
+        if self.catalog_index is not None:
+            self.catalog_index.load()
+            products = self.catalog_index.get_products()
+            if products:
+                self._set_products_names(products)
+                self.products_names_updated.emit(products, [])
+
+        if self._material_usage_index_path is not None and not self._shutdown_event.is_set():
+            try:
+                self.material_usage_index = MaterialUsageIndex(db_path=self._material_usage_index_path)
+            except Exception as e:
+                self.material_usage_index = None
+                self.show_notification.emit("error", f"Не удалось открыть индекс материалов: {e}")
+        logger.info("Local indexes opened in %.3f s", time.perf_counter() - started)
+
+    def _update_material_usage_in_background(self) -> None:
+        """Updates the material usage index until no more updates are requested."""
+        while True:
+            with self._usage_update_lock:
+                if not self._is_usage_update_pending:
+                    self._is_usage_update_running = False
+                    return
+                self._is_usage_update_pending = False
+
+            try:
+                self._update_material_usage()
+            except Exception as e:
+                if self._shutdown_event.is_set():
+                    return  # The index was closed while the update was running
+                self.show_notification.emit(
+                    "error",
+                    f"Произошла ошибка в процессе обновления индекса материалов: {e}"
+                    )
 
-        df = df.rename(columns=mapping)
+    def _update_material_usage(self) -> None:
+        """Indexes the materials of new and changed products and forgets removed ones.
 
-        missing = [key for key in (NOM_KEY, QTY_KEY, UNIT_KEY) if key not in df.columns]
-        if missing:
-            raise ValueError(f"Usecols do not match columns, missing: {missing}, got: {list(df.columns)}")
+        A product is read again only if the workbook signatures recorded in
+        the catalog index differ from those it was indexed with. Read errors
+        are not reported here; they are reported when the product is opened.
+
+        The pass runs at low priority: it parses workbooks one by one in its
+        own thread, leaving the process pool to the products the user opens,
+        idles after every workbook and never stores workbooks in the
+        specification cache, so it does not evict the products the user
+        opened recently.
+        """
+        usage_index = self.material_usage_index
+        catalog_index = self.catalog_index
+        current_products = set()
+        indexed_products = set(usage_index.get_products())
+
+        for product in self.products_names:
+            if self._shutdown_event.is_set():
+                return
+
+            relative_path = "/".join(product)
+            current_products.add(relative_path)
+            signatures = catalog_index.get_product_signatures(relative_path)
+            if signatures is None or signatures == usage_index.get_signatures(relative_path):
+                continue
+            if self.material_usage_opened_only and relative_path not in indexed_products:
+                continue  # Indexed once the user opens it
+
+            files = list(signatures)
+            specifications = []
+            started = time.monotonic()
+            for file_path, signature, rows, error in self._read_specifications(
+                files, update_cache=False, parallel=False
+            ):
+                if error is None:
+                    specifications.append((file_path, signature, rows))
+                if self._shutdown_event.wait((time.monotonic() - started) * MATERIAL_USAGE_IDLE_RATIO):
+                    return
+                started = time.monotonic()
+            materials = MaterialAggregate.build(specifications).get_materials(files)
+            usage_index.update_product(relative_path, signatures, materials)
+
+        usage_index.remove_products(
+            [product for product in usage_index.get_products() if product not in current_products]
+        )
+
+    def _record_material_usage(
+        self, product_path: str, signatures: Dict[str, Tuple[int, int]], materials: List[Dict]
+    ) -> None:
+        """Stores the materials of a loaded product in the material usage index.
+
+        Args:
+            product_path: Full path to the product folder.
+            signatures: (size, mtime_ns) of the workbooks that were read.
+            materials: Aggregated per-unit materials of the product.
+        """
+        if self.material_usage_index is None or self.catalog_index is None:
+            return
+
+        relative_path = self.catalog_index.get_relative_path(product_path)
+        if not relative_path:
+            return
+        try:
+            self.material_usage_index.update_product(relative_path, signatures, materials)
+        except Exception as e:
+            self.show_notification.emit("error", f"Не удалось обновить индекс материалов: {e}")
+
+    def _read_specifications(
+        self,
+        file_paths: List[str],
+        signatures: Optional[Dict[str, Tuple[int, int]]] = None,
+        update_cache: bool = True,
+        parallel: bool = True,
+    ) -> Iterator[Tuple[str, Optional[Tuple[int, int]], Optional[List[SpecRow]], Optional[Exception]]]:
+        """Reads workbooks through the cache, parsing misses in parallel if enabled.
+
+        Files are yielded in the order of ``file_paths`` as soon as each one is
+        available. Closing the generator early cancels parses that have not
+        started yet.
+
+        Args:
+            file_paths: Paths to specification workbooks.
+            signatures: Already known (size, mtime_ns) of some of the files.
+            update_cache: If False, the cache is only read: parsed files are
+                not stored and hits do not count as uses.
+            parallel: If False, misses are parsed one by one in the calling
+                thread and the shared process pool is left to user loads.
+
+        Yields:
+            One (file_path, signature, rows, error) entry per file; either
+            ``rows`` or ``error`` is set.
+        """
+        signatures = dict(signatures or {})
+        results: Dict[str, Tuple[Optional[List[SpecRow]], Optional[Exception]]] = {}
+        pending: List[str] = []
+
+        for file_path in file_paths:
+            try:
+                if file_path not in signatures:
+                    signatures[file_path] = SpecificationCache.get_file_signature(file_path)
+                cached_rows = None
+                if self.spec_cache is not None:
+                    cached_rows = self.spec_cache.get(file_path, signatures[file_path], touch=update_cache)
+            except Exception as e:
+                results[file_path] = (None, e)
+                continue
+            if cached_rows is None:
+                pending.append(file_path)
+            else:
+                results[file_path] = (cached_rows, None)
+
+        futures: Dict[str, Future] = {}
+        executor = self._get_spec_executor() if parallel and len(pending) > 1 else None
+        if executor is not None:
+            futures = {
+                file_path: executor.submit(read_specification, file_path, self.spec_reader_backend)
+                for file_path in pending
+            }
+
+        try:
+            for file_path in file_paths:
+                signature = signatures.get(file_path)
+                if file_path in results:
+                    yield (file_path, signature, *results.pop(file_path))
+                    continue
+
+                try:
+                    if file_path in futures:
+                        rows = futures[file_path].result()
+                    else:
+                        rows = read_specification(file_path, self.spec_reader_backend)
+                except BrokenProcessPool as e:
+                    self._spec_executor = None
+                    yield file_path, signature, None, e
+                    continue
+                except Exception as e:
+                    yield file_path, signature, None, e
+                    continue
+
+                if self.spec_cache is not None and update_cache:
+                    self.spec_cache.put(file_path, signature, rows)
+                yield file_path, signature, rows, None
+        finally:
+            for future in futures.values():
+                future.cancel()
+
+    def _get_spec_executor(self) -> Optional[ProcessPoolExecutor]:
+        """Returns the shared worker pool for parsing workbooks, if enabled.
+
+        Returns:
+            The process pool, or ``None`` when parallel ingestion is disabled.
+        """
+        if self.spec_reader_workers <= 1:
+            return None
 
-        return df
+        with self._spec_executor_lock:
+            if self._spec_executor is None:
+                self._spec_executor = ProcessPoolExecutor(max_workers=self.spec_reader_workers)
+            return self._spec_executor
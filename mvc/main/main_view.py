@@ -1,23 +1,18 @@
-from PyQt5.QtCore import QAbstractItemModel, Qt
+import numpy as np
+from PyQt5.QtCore import QAbstractItemModel, QPoint, Qt
 from PyQt5.QtWidgets import (
     QAbstractItemView,
     QAction,
     QCheckBox,
     QCompleter,
     QHeaderView,
-    QHBoxLayout,
     QLineEdit,
     QMenu,
-    QTableWidgetItem,
     QWidgetAction,
-    QWidget,
 )
 
 from ui import styles
-
-NOM_KEY = "Номенклатура"
-QTY_KEY = "Количество"
-UNIT_KEY = "Ед. изм."
+from utils.table_models import MaterialsTableModel
 
 
 class MainView:
@@ -37,15 +32,14 @@ class MainView:
         self.ui = ui
 
         # Table setup
-        headers = ["", NOM_KEY, QTY_KEY, UNIT_KEY]
-        self.ui.data_tableWidget.setColumnCount(len(headers))
-        self.ui.data_tableWidget.setHorizontalHeaderLabels(headers)
-        header = self.ui.data_tableWidget.horizontalHeader()
+        self.table_model = MaterialsTableModel(self.ui.data_tableView)
+        self.ui.data_tableView.setModel(self.table_model)
+        header = self.ui.data_tableView.horizontalHeader()
         header.setSectionResizeMode(0, QHeaderView.ResizeToContents)
         header.setSectionResizeMode(1, QHeaderView.Stretch)
         header.setSectionResizeMode(2, QHeaderView.ResizeToContents)
         header.setSectionResizeMode(3, QHeaderView.ResizeToContents)
-        self.ui.data_tableWidget.setSelectionMode(QAbstractItemView.NoSelection)
+        self.ui.data_tableView.setSelectionMode(QAbstractItemView.NoSelection)
         self._setup_header_checkbox()
         self.filter_menu = None
         self.filter_actions: dict[str, QWidgetAction] = {}
@@ -57,7 +51,7 @@ class MainView:
         }
         self.placeholder_labels = {
             "name": "названию",
-            "quantity": "количеству",
+            "quantity": "количеству (>5, <=0.2, 1..10)",
             "unit": "единицам измерения",
         }
 
@@ -165,6 +159,14 @@ class MainView:
             placeholder = "Отключены фильтры поиска"
         self.ui.search_line_lineEdit.setPlaceholderText(placeholder)
 
+    def set_search_placeholder(self, text: str) -> None:
+        """Sets the search field placeholder text.
+
+        Args:
+            text: Placeholder to display.
+        """
+        self.ui.search_line_lineEdit.setPlaceholderText(text)
+
     def hide_search_filters_menu(self) -> None:
         """Hides the filter menu if it is open."""
         if self.filter_menu and self.filter_menu.isVisible():
@@ -188,52 +190,27 @@ class MainView:
         checkbox_text = base_text if not text else f"{base_text}: {text}"
         self.ui.search_in_materials_checkBox.setText(checkbox_text)
 
-    def update_table_widget_data(
-        self,
-        data: list[dict],
-        selection: dict[str, bool],
-        on_row_checkbox_changed,
-    ) -> None:
-        """Updates the data in the materials table.
+    def set_loading_status(self, text: str) -> None:
+        """Shows a loading message in the window status bar.
 
         Args:
-            data: A list of dictionaries, where each dictionary is a row.
-            selection: Mapping of material names to their checkbox state.
-            on_row_checkbox_changed: Callback invoked when a row checkbox changes.
+            text: Message to display, or an empty string to clear it.
         """
-        self.ui.data_tableWidget.setRowCount(0)  # Clear only the rows
-
-        # Populate the table with data
-        for row_index, item in enumerate(data):
-            self.ui.data_tableWidget.insertRow(row_index)
-
-            # Column "Select"
-            material_name = item.get(NOM_KEY, "")
-            checkbox = QCheckBox()
-            checkbox.setChecked(selection.get(material_name, True))
-            checkbox.stateChanged.connect(
-                lambda state, name=material_name: on_row_checkbox_changed(
-                    name, state == Qt.Checked
-                )
-            )
-            checkbox_container = QWidget()
-            layout = QHBoxLayout(checkbox_container)
-            layout.setContentsMargins(0, 0, 0, 0)
-            layout.setAlignment(Qt.AlignCenter)
-            layout.addWidget(checkbox)
-            self.ui.data_tableWidget.setCellWidget(row_index, 0, checkbox_container)
-
-            # Column "Nomenclature"
-            nomenclature_item = QTableWidgetItem(item.get(NOM_KEY, ""))
-            self.ui.data_tableWidget.setItem(row_index, 1, nomenclature_item)
+        status_bar = self.ui.centralwidget.window().statusBar()
+        if text:
+            status_bar.showMessage(text)
+        else:
+            status_bar.clearMessage()
 
-            # Column "Quantity"
-            quantity_item = QTableWidgetItem(str(item.get(QTY_KEY, "")))
-            self.ui.data_tableWidget.setItem(row_index, 2, quantity_item)
+    def update_table_data(self, data: list[dict], selection: np.ndarray, selection_indices: np.ndarray) -> None:
+        """Updates the data in the materials table.
 
-            # Column "Unit"
-            unit_item = QTableWidgetItem(item.get(UNIT_KEY, ""))
-            self.ui.data_tableWidget.setItem(row_index, 3, unit_item)
+        Args:
+            data: A list of dictionaries, where each dictionary is a row.
+            selection: Selection flags of all materials of the product.
+            selection_indices: Position of every row's material in ``selection``.
+        """
+        self.table_model.set_materials(data, selection, selection_indices)
 
     def update_create_document_button_state(self, enabled: bool) -> None:
         """Updates the enabled state of the create document button.
@@ -299,6 +276,23 @@ class MainView:
             lambda state: handler(state == 2)
         )
 
+    def refresh_row_checkboxes(self) -> None:
+        """Repaints the row checkboxes after the selection of many materials changed."""
+        self.table_model.refresh_check_states()
+
+    def get_table_check_counts(self) -> tuple[int, int]:
+        """Returns the number of checked rows and the number of all rows of the table."""
+        return self.table_model.checked_count, self.table_model.rowCount()
+
+    def row_checkbox_state_changed(self, handler) -> None:
+        """Connects a handler to the row checkboxes of the materials table.
+
+        Args:
+            handler: The function to call with the material name and whether
+                     its row is now checked.
+        """
+        self.table_model.check_state_changed.connect(handler)
+
     def header_checkbox_state_changed(self, handler) -> None:
         """Connects a handler to the header checkbox."""
         self.header_checkbox.stateChanged.connect(handler)
@@ -321,9 +315,46 @@ class MainView:
         """
         self.header_checkbox.setEnabled(enabled)
 
+    def setup_material_context_menu(self, on_usage_requested, on_invert_requested) -> None:
+        """Adds a context menu to the materials table.
+
+        Args:
+            on_usage_requested: The function to call with the nomenclature of
+                                the clicked row to look up products using it.
+            on_invert_requested: The function to call to invert the selection.
+        """
+        table = self.ui.data_tableView
+        table.setContextMenuPolicy(Qt.CustomContextMenu)
+        table.customContextMenuRequested.connect(
+            lambda position: self._show_material_context_menu(position, on_usage_requested, on_invert_requested)
+        )
+
+    def _show_material_context_menu(self, position: QPoint, on_usage_requested, on_invert_requested) -> None:
+        """Shows the context menu of the materials table.
+
+        Args:
+            position: Click position in the table viewport.
+            on_usage_requested: The function to call with the nomenclature of the row.
+            on_invert_requested: The function to call to invert the selection.
+        """
+        table = self.ui.data_tableView
+        if not self.table_model.rowCount():
+            return
+
+        menu = QMenu(table)
+        row = table.rowAt(position.y())
+        if row >= 0:
+            material_name = self.table_model.material_name(row)
+            usage_action = menu.addAction("Найти изделия с этим материалом")
+            usage_action.triggered.connect(lambda: on_usage_requested(material_name))
+            menu.addSeparator()
+        invert_action = menu.addAction("Инвертировать выбор")
+        invert_action.triggered.connect(on_invert_requested)
+        menu.exec_(table.viewport().mapToGlobal(position))
+
     def _setup_header_checkbox(self) -> None:
         """Initializes the header checkbox and positions it."""
-        header = self.ui.data_tableWidget.horizontalHeader()
+        header = self.ui.data_tableView.horizontalHeader()
         self.header_checkbox = QCheckBox(header)
         self.header_checkbox.setTristate(True)
         self.header_checkbox.setChecked(True)
@@ -333,7 +364,7 @@ class MainView:
 
     def _update_header_checkbox_position(self) -> None:
         """Centers the header checkbox within its section."""
-        header = self.ui.data_tableWidget.horizontalHeader()
+        header = self.ui.data_tableView.horizontalHeader()
         if header.count() == 0:
             return
 
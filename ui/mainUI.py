@@ -375,20 +375,18 @@ class Ui_MainWindow(object):
         self.verticalLayout.setContentsMargins(8, 8, 8, 8)
         self.verticalLayout.setSpacing(0)
         self.verticalLayout.setObjectName("verticalLayout")
-        self.data_tableWidget = QtWidgets.QTableWidget(self.table_frame)
-        self.data_tableWidget.setMinimumSize(QtCore.QSize(0, 200))
+        self.data_tableView = QtWidgets.QTableView(self.table_frame)
+        self.data_tableView.setMinimumSize(QtCore.QSize(0, 200))
         font = QtGui.QFont()
         font.setPointSize(12)
-        self.data_tableWidget.setFont(font)
-        self.data_tableWidget.viewport().setProperty("cursor", QtGui.QCursor(QtCore.Qt.ArrowCursor))
-        self.data_tableWidget.setEditTriggers(QtWidgets.QAbstractItemView.AnyKeyPressed|QtWidgets.QAbstractItemView.EditKeyPressed)
-        self.data_tableWidget.setAlternatingRowColors(True)
-        self.data_tableWidget.setObjectName("data_tableWidget")
-        self.data_tableWidget.setColumnCount(0)
-        self.data_tableWidget.setRowCount(0)
-        self.data_tableWidget.horizontalHeader().setStretchLastSection(False)
-        self.data_tableWidget.verticalHeader().setStretchLastSection(True)
-        self.verticalLayout.addWidget(self.data_tableWidget)
+        self.data_tableView.setFont(font)
+        self.data_tableView.viewport().setProperty("cursor", QtGui.QCursor(QtCore.Qt.ArrowCursor))
+        self.data_tableView.setEditTriggers(QtWidgets.QAbstractItemView.AnyKeyPressed|QtWidgets.QAbstractItemView.EditKeyPressed)
+        self.data_tableView.setAlternatingRowColors(True)
+        self.data_tableView.setObjectName("data_tableView")
+        self.data_tableView.horizontalHeader().setStretchLastSection(False)
+        self.data_tableView.verticalHeader().setStretchLastSection(True)
+        self.verticalLayout.addWidget(self.data_tableView)
         self.verticalLayout_6.addWidget(self.table_frame)
         self.create_document_frame = QtWidgets.QFrame(self.centralwidget)
         sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Fixed)
@@ -0,0 +1,104 @@
+from typing import Any, List, Optional
+
+from PyQt5.QtCore import QAbstractListModel, QModelIndex, QObject, Qt
+
+from utils.search_index import normalize_search_key
+
+
+class KeyedStringListModel(QAbstractListModel):
+    """A list of strings stored side by side with their search keys.
+
+    It can be used in place of ``QStringListModel``. The key of every string
+    is normalized once, when the string is added, so filters read the keys
+    directly instead of fetching and lowercasing each row on every keystroke.
+    """
+
+    def __init__(self, strings: Optional[List[str]] = None, parent: Optional[QObject] = None) -> None:
+        """Initializes the model.
+
+        Args:
+            strings: Initial display strings.
+            parent: Parent Qt object.
+        """
+        super().__init__(parent)
+        self._strings: List[str] = list(strings or [])
+        self._keys: List[str] = [normalize_search_key(text) for text in self._strings]
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        """Returns the number of strings."""
+        return 0 if parent.isValid() else len(self._strings)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole) -> Any:
+        """Returns the string of a row for the display and edit roles."""
+        if not index.isValid() or not 0 <= index.row() < len(self._strings):
+            return None
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            return self._strings[index.row()]
+        return None
+
+    def setData(self, index: QModelIndex, value: Any, role: int = Qt.EditRole) -> bool:
+        """Replaces the string of a row and its key."""
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.EditRole):
+            return False
+        row = index.row()
+        self._strings[row] = str(value)
+        self._keys[row] = normalize_search_key(self._strings[row])
+        self.dataChanged.emit(index, index, [role])
+        return True
+
+    def insertRows(self, row: int, count: int, parent: QModelIndex = QModelIndex()) -> bool:
+        """Inserts empty strings before a row."""
+        if count < 1 or not 0 <= row <= len(self._strings) or parent.isValid():
+            return False
+        self.beginInsertRows(QModelIndex(), row, row + count - 1)
+        self._strings[row:row] = [""] * count
+        self._keys[row:row] = [""] * count
+        self.endInsertRows()
+        return True
+
+    def removeRows(self, row: int, count: int, parent: QModelIndex = QModelIndex()) -> bool:
+        """Removes rows starting at a row."""
+        if count < 1 or row < 0 or row + count > len(self._strings) or parent.isValid():
+            return False
+        self.beginRemoveRows(QModelIndex(), row, row + count - 1)
+        del self._strings[row:row + count]
+        del self._keys[row:row + count]
+        self.endRemoveRows()
+        return True
+
+    def append_strings(self, strings: List[str]) -> None:
+        """Appends strings after the last row as a single insertion.
+
+        Args:
+            strings: Display strings to append.
+        """
+        if not strings:
+            return
+        first_row = len(self._strings)
+        self.beginInsertRows(QModelIndex(), first_row, first_row + len(strings) - 1)
+        self._strings.extend(strings)
+        self._keys.extend(normalize_search_key(text) for text in strings)
+        self.endInsertRows()
+
+    def stringList(self) -> List[str]:
+        """Returns a copy of the display strings."""
+        return list(self._strings)
+
+    def setStringList(self, strings: List[str]) -> None:
+        """Replaces all strings.
+
+        Args:
+            strings: New display strings.
+        """
+        self.beginResetModel()
+        self._strings = list(strings)
+        self._keys = [normalize_search_key(text) for text in self._strings]
+        self.endResetModel()
+
+    def keys(self) -> List[str]:
+        """Returns the search keys in row order; the list must not be modified."""
+        return self._keys
+
+    def key(self, row: int) -> str:
+        """Returns the search key of a row."""
+        return self._keys[row]
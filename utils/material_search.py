@@ -0,0 +1,293 @@
+import math
+import re
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# Column keys in the source Excel files
+NOM_KEY = "Номенклатура"
+QTY_KEY = "Количество"
+UNIT_KEY = "Ед. изм."
+
+# A number as typed in the search field; both "." and "," are decimal separators
+NUMBER_PATTERN = r"-?(?:\d+(?:[.,]\d*)?|[.,]\d+)"
+# "1..10": an inclusive range of quantities
+RANGE_PATTERN = re.compile(rf"^({NUMBER_PATTERN})\.\.({NUMBER_PATTERN})$")
+# ">5", "<=0.2", "=3" or a bare number, which means equality
+COMPARISON_PATTERN = re.compile(rf"^(<=|>=|<|>|=)?({NUMBER_PATTERN})$")
+
+# Relative tolerance of quantity comparisons; quantities are sums of floats
+QUANTITY_TOLERANCE = 1e-9
+
+# Search filters in the order they are listed in the filters menu
+SEARCH_FILTER_KEYS = ("name", "quantity", "unit")
+
+# Number of recent queries whose results are kept for narrowing
+MAX_CACHED_QUERIES = 32
+
+
+def parse_quantity_predicate(word: str) -> Optional[Tuple[str, float, float]]:
+    """Parses a search word that compares quantities with a number.
+
+    Args:
+        word: Single word of the search query.
+
+    Returns:
+        (operator, first number, second number), where the operator is one of
+        ``"<"``, ``"<="``, ``">"``, ``">="``, ``"="`` or ``".."`` and the
+        second number is only used by ``".."``; ``None`` if the word is not a
+        numeric predicate.
+    """
+    match = RANGE_PATTERN.match(word)
+    if match:
+        low, high = sorted(float(number.replace(",", ".")) for number in match.groups())
+        return "..", low, high
+
+    match = COMPARISON_PATTERN.match(word)
+    if match:
+        number = float(match.group(2).replace(",", "."))
+        return match.group(1) or "=", number, number
+    return None
+
+
+def get_quantity_bounds(predicate: Tuple[str, float, float]) -> Tuple[float, bool, float, bool]:
+    """Converts a numeric predicate to the range of quantities it matches.
+
+    Args:
+        predicate: Predicate returned by ``parse_quantity_predicate``.
+
+    Returns:
+        (low, whether low is included, high, whether high is included),
+        widened by the comparison tolerance; open sides are infinite.
+    """
+    operator, first, second = predicate
+    first_tolerance = QUANTITY_TOLERANCE * max(1.0, abs(first))
+    if operator == ">":
+        return first + first_tolerance, False, math.inf, True
+    if operator == ">=":
+        return first - first_tolerance, True, math.inf, True
+    if operator == "<":
+        return -math.inf, True, first - first_tolerance, False
+    if operator == "<=":
+        return -math.inf, True, first + first_tolerance, True
+    if operator == "..":
+        return first - first_tolerance, True, second + QUANTITY_TOLERANCE * max(1.0, abs(second)), True
+    return first - first_tolerance, True, first + first_tolerance, True
+
+
+class MaterialSearch:
+    """Filters the materials of a product by the words of the search field.
+
+    A material matches if every word matches one of the fields enabled by
+    the search filters. With the quantity filter enabled, words such as
+    ``>5``, ``<=0.2``, ``1..10`` or a bare number compare quantities
+    numerically. They are answered by binary search over the quantities
+    sorted once per materials list, so only the rows left by them are
+    compared with the remaining text words.
+
+    The results of the last ``MAX_CACHED_QUERIES`` queries are kept in an
+    LRU cache, so extending a query filters only the previous results and
+    erasing it back returns cached results.
+    """
+
+    def __init__(self, materials: List[Dict]) -> None:
+        """Prepares the search keys of a materials list.
+
+        Args:
+            materials: Materials as shown in the table.
+        """
+        self.materials: List[Dict] = materials
+        self._names: List[str] = [str(item.get(NOM_KEY, "")).lower() for item in materials]
+        self._units: List[str] = [str(item.get(UNIT_KEY, "")).lower() for item in materials]
+
+        quantities = np.array([self._to_float(item.get(QTY_KEY)) for item in materials], dtype=float)
+        order = np.argsort(quantities, kind="stable")
+        order = order[~np.isnan(quantities[order])]  # Non-numeric quantities never match
+        self._quantity_order: np.ndarray = order
+        self._sorted_quantities: np.ndarray = quantities[order]
+
+        # (query words, active filters) -> matched rows, least recently used first
+        self._cached_rows: "OrderedDict[Tuple[Tuple[str, ...], Tuple[str, ...]], List[int]]" = OrderedDict()
+
+    def search(self, query: str, filters: Dict[str, bool]) -> List[Dict]:
+        """Finds the materials that match every word of a query.
+
+        Results of recent queries are cached. A query that refines a cached
+        one, such as "сталь 10" after "сталь", is evaluated only on the rows
+        matched by that query.
+
+        Args:
+            query: Text of the search field.
+            filters: Search filter flags keyed by ``"name"``, ``"quantity"`` and ``"unit"``.
+
+        Returns:
+            Matching materials in their original order.
+        """
+        words = tuple(query.strip().lower().split())
+        active_filters = tuple(key for key in SEARCH_FILTER_KEYS if filters.get(key))
+        if not words or not active_filters:
+            return list(self.materials)
+
+        cache_key = (words, active_filters)
+        rows = self._cached_rows.get(cache_key)
+        if rows is None:
+            rows = self._match(words, active_filters, self._find_cached_superset(words, active_filters))
+            self._cached_rows[cache_key] = rows
+            if len(self._cached_rows) > MAX_CACHED_QUERIES:
+                self._cached_rows.popitem(last=False)
+        else:
+            self._cached_rows.move_to_end(cache_key)
+        return [self.materials[row] for row in rows]
+
+    def _match(
+        self, words: Tuple[str, ...], active_filters: Tuple[str, ...], rows: Optional[List[int]]
+    ) -> List[int]:
+        """Evaluates a query on a set of rows.
+
+        Numeric predicates are evaluated first, by binary search; the rows
+        left by them are then compared with the text words.
+
+        Args:
+            words: Lowercased words of the query.
+            active_filters: Enabled search filters.
+            rows: Rows to search in ascending order, or ``None`` for all rows.
+
+        Returns:
+            Matching rows in ascending order.
+        """
+        text_fields = self._get_text_fields(active_filters)
+        is_quantity_searched = "quantity" in active_filters
+
+        candidates: Optional[np.ndarray] = None if rows is None else np.array(rows, dtype=np.int64)
+        text_words: List[str] = []
+        for word in words:
+            predicate = parse_quantity_predicate(word) if is_quantity_searched else None
+            if predicate is None:
+                text_words.append(word)
+                continue
+
+            matched = self._find_quantity_rows(get_quantity_bounds(predicate))
+            if predicate[0] == "=" and text_fields:
+                # A bare number may also be part of a name or a unit
+                search_rows = range(len(self.materials)) if candidates is None else candidates.tolist()
+                text_rows = self._find_text_rows(word, text_fields, search_rows)
+                matched = np.union1d(matched, np.array(text_rows, dtype=np.int64))
+            candidates = matched if candidates is None else np.intersect1d(candidates, matched, assume_unique=True)
+
+        matched_rows: Iterable[int] = range(len(self.materials))
+        if candidates is not None:
+            matched_rows = np.sort(candidates).tolist()
+        for word in text_words:
+            matched_rows = self._find_text_rows(word, text_fields, matched_rows)
+        return list(matched_rows)
+
+    def _find_cached_superset(
+        self, words: Tuple[str, ...], active_filters: Tuple[str, ...]
+    ) -> Optional[List[int]]:
+        """Finds the smallest cached result that contains every match of a query.
+
+        Args:
+            words: Lowercased words of the query.
+            active_filters: Enabled search filters.
+
+        Returns:
+            Rows matched by a cached query that the query refines, or ``None``.
+        """
+        is_quantity_searched = "quantity" in active_filters
+        has_text_fields = bool(self._get_text_fields(active_filters))
+        superset: Optional[List[int]] = None
+        for (cached_words, cached_filters), rows in self._cached_rows.items():
+            if cached_filters != active_filters or (superset is not None and len(rows) >= len(superset)):
+                continue
+            if all(
+                any(self._is_narrower(word, cached_word, is_quantity_searched, has_text_fields) for word in words)
+                for cached_word in cached_words
+            ):
+                superset = rows
+        return superset
+
+    @staticmethod
+    def _is_narrower(word: str, cached_word: str, is_quantity_searched: bool, has_text_fields: bool) -> bool:
+        """Checks whether every row matched by a word is matched by a cached word.
+
+        A longer text word only matches rows that contain the shorter one.
+        Substrings say nothing about numbers, though: "50" is not narrower
+        than "5". A numeric predicate is narrower than another one only if its
+        quantity range lies within the other range; a bare number also
+        matches text when text fields are searched, so it only refines itself.
+
+        Args:
+            word: Word of the new query.
+            cached_word: Word of the cached query.
+            is_quantity_searched: Whether the quantity filter is enabled.
+            has_text_fields: Whether names or units are searched.
+
+        Returns:
+            True if the matches of ``word`` are a subset of those of ``cached_word``.
+        """
+        if word == cached_word:
+            return True
+
+        predicate = parse_quantity_predicate(word) if is_quantity_searched else None
+        cached_predicate = parse_quantity_predicate(cached_word) if is_quantity_searched else None
+        if predicate is None and cached_predicate is None:
+            return cached_word in word
+        if predicate is None or cached_predicate is None:
+            return False
+        if has_text_fields and "=" in (predicate[0], cached_predicate[0]):
+            return False
+
+        low, is_low_included, high, is_high_included = get_quantity_bounds(predicate)
+        cached_low, is_cached_low_included, cached_high, is_cached_high_included = get_quantity_bounds(
+            cached_predicate
+        )
+        is_low_within = low > cached_low or (low == cached_low and (is_cached_low_included or not is_low_included))
+        is_high_within = high < cached_high or (
+            high == cached_high and (is_cached_high_included or not is_high_included)
+        )
+        return is_low_within and is_high_within
+
+    def _get_text_fields(self, active_filters: Tuple[str, ...]) -> List[List[str]]:
+        """Returns the lowercased values of the text fields enabled by the filters."""
+        return [keys for key, keys in (("name", self._names), ("unit", self._units)) if key in active_filters]
+
+    @staticmethod
+    def _find_text_rows(word: str, text_fields: List[List[str]], rows: Iterable[int]) -> List[int]:
+        """Finds the rows where any of the searched fields contains a word.
+
+        Args:
+            word: Lowercased search word.
+            text_fields: Lowercased values of each searched field.
+            rows: Rows to search in ascending order.
+
+        Returns:
+            The matching rows in ascending order.
+        """
+        if len(text_fields) == 1:
+            keys = text_fields[0]
+            return [row for row in rows if word in keys[row]]
+        return [row for row in rows if any(word in keys[row] for keys in text_fields)]
+
+    def _find_quantity_rows(self, bounds: Tuple[float, bool, float, bool]) -> np.ndarray:
+        """Finds the rows whose quantity lies within a range.
+
+        Args:
+            bounds: Range returned by ``get_quantity_bounds``.
+
+        Returns:
+            Indices of the matching rows, unordered.
+        """
+        low, is_low_included, high, is_high_included = bounds
+        quantities = self._sorted_quantities
+        start = np.searchsorted(quantities, low, side="left" if is_low_included else "right")
+        end = np.searchsorted(quantities, high, side="right" if is_high_included else "left")
+        return self._quantity_order[start:max(start, end)]
+
+    @staticmethod
+    def _to_float(value) -> float:
+        """Converts a quantity to a number, or NaN if it is not numeric."""
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return float("nan")
@@ -0,0 +1,82 @@
+from itertools import chain
+from typing import Dict, Iterable, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+from utils.spec_readers import SpecRow
+
+# Column keys in the source Excel files
+NOM_KEY = "Номенклатура"
+QTY_KEY = "Количество"
+UNIT_KEY = "Ед. изм."
+RMP_KEY = "РМП"
+
+MATERIAL_COLUMNS = [NOM_KEY, QTY_KEY, UNIT_KEY, RMP_KEY]
+
+
+def build_materials_frame(rows_per_file: Sequence[List[SpecRow]]) -> pd.DataFrame:
+    """Concatenates the rows of several specification files into one frame.
+
+    Args:
+        rows_per_file: Normalized rows of each file, in merge order.
+
+    Returns:
+        DataFrame with the nomenclature, quantity, unit and RMP columns.
+    """
+    rows = list(chain.from_iterable(rows_per_file))
+    return pd.DataFrame(
+        {
+            NOM_KEY: np.array([row[0] for row in rows], dtype=object),
+            QTY_KEY: np.fromiter((row[1] for row in rows), dtype=float, count=len(rows)),
+            UNIT_KEY: np.array([row[2] for row in rows], dtype=object),
+            RMP_KEY: np.fromiter((row[3] for row in rows), dtype=bool, count=len(rows)),
+        }
+    )
+
+
+def aggregate_materials(frame: pd.DataFrame, semi_product_names: Iterable[str]) -> pd.DataFrame:
+    """Sums material quantities per nomenclature in a columnar way.
+
+    Nomenclatures are factorized once, so semi-finished products of the same
+    product are masked per distinct name rather than per row. Quantities are
+    converted to per-unit values (divided by 1000) and summed per group in
+    row order; the unit and RMP flag of the first occurrence are kept, and
+    materials stay in first-seen order.
+
+    Args:
+        frame: Rows built by ``build_materials_frame``.
+        semi_product_names: Lowercased, stripped semi-finished product names.
+
+    Returns:
+        DataFrame with one row per nomenclature.
+    """
+    codes, names = pd.factorize(frame[NOM_KEY].to_numpy(), sort=False)
+    quantities = np.bincount(codes, weights=frame[QTY_KEY].to_numpy() / 1000, minlength=len(names))
+    _, first_rows = np.unique(codes, return_index=True)
+
+    is_material = ~pd.Index(names, dtype=object).str.lower().str.strip().isin(list(semi_product_names))
+    first_rows = first_rows[is_material]
+    return pd.DataFrame(
+        {
+            NOM_KEY: names[is_material],
+            QTY_KEY: quantities[is_material],
+            UNIT_KEY: frame[UNIT_KEY].to_numpy()[first_rows],
+            RMP_KEY: frame[RMP_KEY].to_numpy()[first_rows],
+        }
+    )
+
+
+def materials_to_records(materials: pd.DataFrame) -> List[Dict]:
+    """Converts an aggregated materials frame to the list-of-dicts used by the views.
+
+    Args:
+        materials: Aggregated materials frame.
+
+    Returns:
+        One dictionary per material, keyed by the standard column keys.
+    """
+    return [
+        {NOM_KEY: name, QTY_KEY: quantity, UNIT_KEY: unit, RMP_KEY: is_rmp}
+        for name, quantity, unit, is_rmp in zip(*(materials[key].tolist() for key in MATERIAL_COLUMNS))
+    ]
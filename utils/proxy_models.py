@@ -1,15 +1,45 @@
-from PyQt5.QtCore import QModelIndex, QSortFilterProxyModel, Qt
+from typing import Dict, List, Optional
 
+from PyQt5.QtCore import (
+    QAbstractItemModel,
+    QAbstractProxyModel,
+    QModelIndex,
+    QObject,
+    QSortFilterProxyModel,
+    Qt,
+)
 
+from utils.list_models import KeyedStringListModel
+from utils.search_index import NgramIndex, normalize_search_key
 
-class CustomFilterProxyModel(QSortFilterProxyModel):
-    """A custom proxy model for advanced filtering of suggestions.
 
-    This model overrides the default filtering behavior to implement a word-based
-    search. The input filter text is split into words, and a row is accepted
-    only if all words are present in the item text.
+class KeyFilterProxyModel(QSortFilterProxyModel):
+    """A proxy model for word-based filtering of suggestions.
+
+    The filter text is split into words, and a row is accepted only if all
+    words are present in the item text. Rows are matched against the keys
+    precomputed by ``KeyedStringListModel``, and the query is normalized once
+    per change, so a keystroke costs one substring test per row and word.
     """
 
+    def __init__(self, parent: Optional[QObject] = None) -> None:
+        """Initializes the proxy with an empty filter.
+
+        Args:
+            parent: Parent Qt object.
+        """
+        super().__init__(parent)
+        self._search_words: List[str] = []
+
+    def set_filter_text(self, text: str) -> None:
+        """Shows only the rows that contain every word of the text.
+
+        Args:
+            text: Words separated by whitespace; an empty text shows all rows.
+        """
+        self._search_words = normalize_search_key(text).split()
+        self.invalidateFilter()
+
     def filterAcceptsRow(self, source_row: int, source_parent: QModelIndex) -> bool:
         """Determines if a row should be included in the model.
 
@@ -20,18 +50,195 @@ class CustomFilterProxyModel(QSortFilterProxyModel):
         Returns:
             True if the row is accepted, False otherwise.
         """
-        index = self.sourceModel().index(source_row, 0, source_parent)
-        item_text = self.sourceModel().data(index, Qt.DisplayRole)
+        if not self._search_words:
+            return True
 
-        if item_text is None:
-            return False
+        key = self.sourceModel().key(source_row)
+        return all(word in key for word in self._search_words)
 
-        filter_string = self.filterRegExp().pattern()
-        search_words = filter_string.lower().split()
 
-        if not search_words:
-            return True
+class IndexedFilterProxyModel(QAbstractProxyModel):
+    """A flat proxy model that exposes only the rows matching a word query.
+
+    Filtering follows the same rule as ``KeyFilterProxyModel``, but the
+    matching rows come from an ``NgramIndex`` built once per source model,
+    so a keystroke costs a few set intersections instead of a pass over
+    every row through the Qt model API. The index follows row insertions,
+    removals and data changes of the source model.
+    """
+
+    def __init__(self, parent: Optional[QObject] = None) -> None:
+        """Initializes an empty proxy.
+
+        Args:
+            parent: Parent Qt object.
+        """
+        super().__init__(parent)
+        self._search_index = NgramIndex()
+        self._filter_text: str = ""
+        # Visible source rows in source order; None while the filter shows every row
+        self._source_rows: Optional[List[int]] = None
+        self._proxy_rows: Dict[int, int] = {}
+
+    def setSourceModel(self, source_model: QAbstractItemModel) -> None:
+        """Replaces the source model and indexes its rows.
+
+        Args:
+            source_model: A flat list model, such as ``KeyedStringListModel``.
+        """
+        previous_model = self.sourceModel()
+        if previous_model is not None:
+            for signal, slot in self._get_source_connections(previous_model):
+                signal.disconnect(slot)
+
+        self.beginResetModel()
+        super().setSourceModel(source_model)
+        for signal, slot in self._get_source_connections(source_model):
+            signal.connect(slot)
+        self._build_index()
+        self._apply_filter()
+        self.endResetModel()
+
+    def set_filter_text(self, text: str) -> None:
+        """Shows only the rows that contain every word of the text.
 
-        item_text_lower = item_text.lower()
+        Args:
+            text: Words separated by whitespace; an empty text shows all rows.
+        """
+        self.beginResetModel()
+        self._filter_text = text
+        self._apply_filter()
+        self.endResetModel()
+
+    def index(self, row: int, column: int = 0, parent: QModelIndex = QModelIndex()) -> QModelIndex:
+        """Returns the index of a visible row."""
+        if parent.isValid() or column != 0 or not 0 <= row < self.rowCount():
+            return QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index: QModelIndex = QModelIndex()) -> QModelIndex:
+        """Returns an invalid index, since the model is flat."""
+        return QModelIndex()
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        """Returns the number of visible rows."""
+        if parent.isValid():
+            return 0
+        return len(self._search_index) if self._source_rows is None else len(self._source_rows)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        """Returns the number of columns; the model has a single one."""
+        return 0 if parent.isValid() else 1
+
+    def mapToSource(self, proxy_index: QModelIndex) -> QModelIndex:
+        """Maps a visible row to its row in the source model."""
+        if not proxy_index.isValid() or self.sourceModel() is None:
+            return QModelIndex()
+        row = proxy_index.row()
+        source_row = row if self._source_rows is None else self._source_rows[row]
+        return self.sourceModel().index(source_row, proxy_index.column())
+
+    def mapFromSource(self, source_index: QModelIndex) -> QModelIndex:
+        """Maps a source row to its visible row, if it matches the filter."""
+        if not source_index.isValid():
+            return QModelIndex()
+        if self._source_rows is None:
+            return self.index(source_index.row(), source_index.column())
+        row = self._proxy_rows.get(source_index.row())
+        if row is None:
+            return QModelIndex()
+        return self.index(row, source_index.column())
+
+    def _get_source_connections(self, source_model: QAbstractItemModel) -> list:
+        """Pairs the source model signals with the slots that keep the index in sync."""
+        return [
+            (source_model.rowsAboutToBeInserted, self._on_source_about_to_change),
+            (source_model.rowsAboutToBeRemoved, self._on_source_about_to_change),
+            (source_model.modelAboutToBeReset, self._on_source_about_to_change),
+            (source_model.layoutAboutToBeChanged, self._on_source_about_to_change),
+            (source_model.rowsInserted, self._on_source_rows_inserted),
+            (source_model.rowsRemoved, self._on_source_changed),
+            (source_model.modelReset, self._on_source_changed),
+            (source_model.layoutChanged, self._on_source_changed),
+            (source_model.dataChanged, self._on_source_data_changed),
+        ]
+
+    def _on_source_about_to_change(self, *args) -> None:
+        """Starts a reset before the source rows move."""
+        self.beginResetModel()
+
+    def _on_source_changed(self, *args) -> None:
+        """Rebuilds the index after rows were removed or reordered."""
+        self._build_index()
+        self._apply_filter()
+        self.endResetModel()
+
+    def _on_source_rows_inserted(self, parent: QModelIndex, first: int, last: int) -> None:
+        """Indexes rows appended to the source; other insertions rebuild the index."""
+        if first == len(self._search_index):
+            for row in range(first, last + 1):
+                self._search_index.append(self._get_source_text(row))
+        else:
+            self._build_index()
+        self._apply_filter()
+        self.endResetModel()
+
+    def _on_source_data_changed(self, top_left: QModelIndex, bottom_right: QModelIndex, *args) -> None:
+        """Reindexes the rows whose text changed.
+
+        The proxy is reset only if the set of visible rows changed; otherwise
+        the changed rows are just reported as changed.
+        """
+        first, last = top_left.row(), bottom_right.row()
+        for row in range(first, last + 1):
+            self._search_index.replace(row, self._get_source_text(row))
+
+        matching_rows = self._search_index.search(self._filter_text)
+        if matching_rows != self._source_rows:
+            self.beginResetModel()
+            self._set_visible_rows(matching_rows)
+            self.endResetModel()
+            return
+
+        if matching_rows is None:
+            visible_rows = [first, last]
+        else:
+            visible_rows = [row for row in map(self._proxy_rows.get, range(first, last + 1)) if row is not None]
+        if visible_rows:
+            self.dataChanged.emit(self.index(min(visible_rows)), self.index(max(visible_rows)), *args)
+
+    def _build_index(self) -> None:
+        """Indexes every row of the source model."""
+        source_model = self.sourceModel()
+        if source_model is None:
+            texts = []
+        elif isinstance(source_model, KeyedStringListModel):
+            texts = source_model.keys()  # Already normalized, no per-row model calls
+        else:
+            texts = [self._get_source_text(row) for row in range(source_model.rowCount())]
+        self._search_index = NgramIndex(texts)
+
+    def _apply_filter(self) -> None:
+        """Recomputes the visible rows for the current filter text."""
+        self._set_visible_rows(self._search_index.search(self._filter_text))
+
+    def _set_visible_rows(self, matching_rows: Optional[List[int]]) -> None:
+        """Stores the visible source rows and their positions in the proxy.
+
+        Args:
+            matching_rows: Source rows matching the filter, or ``None`` for all rows.
+        """
+        if matching_rows is None:
+            self._source_rows = None
+            self._proxy_rows = {}
+        else:
+            self._source_rows = matching_rows
+            self._proxy_rows = {source_row: row for row, source_row in enumerate(self._source_rows)}
 
-        return all(word in item_text_lower for word in search_words)
\ No newline at end of file
+    def _get_source_text(self, row: int) -> str:
+        """Returns the display text of a source row."""
+        source_model = self.sourceModel()
+        if isinstance(source_model, KeyedStringListModel):
+            return source_model.key(row)
+        text = source_model.data(source_model.index(row, 0), Qt.DisplayRole)
+        return text or ""
@@ -0,0 +1,334 @@
+import heapq
+from collections import defaultdict
+from typing import DefaultDict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Length of the character n-grams stored in the index
+NGRAM_SIZE = 3
+
+# Joins the indexed texts into one string while the index is built
+TEXT_SEPARATOR = "\x00"
+
+# Weights of the fuzzy search score
+SIMILARITY_WEIGHT = 0.5
+EDIT_WEIGHT = 0.5
+PREFIX_BONUS = 0.2
+WORD_PREFIX_BONUS = 0.1
+DEPTH_PENALTY = 0.02
+
+# Candidates scored in full by the fuzzy search: top_k times the factor, at least the minimum
+PRESELECTION_FACTOR = 4
+MIN_PRESELECTED = 100
+
+
+def normalize_search_key(text: str) -> str:
+    """Returns the form of a text used for case-insensitive matching.
+
+    Args:
+        text: Display text or a search query.
+
+    Returns:
+        The casefolded text.
+    """
+    return text.casefold()
+
+
+class NgramIndex:
+    """An inverted index of character trigrams for substring search.
+
+    A query is split into words and a text matches if it contains every word,
+    compared by ``normalize_search_key``, which is what the completers do. For
+    every word of at least three characters the candidate texts are the
+    intersection of the posting lists of its trigrams, so only a handful of
+    texts are compared with the query instead of all of them. Shorter words
+    cannot be looked up and are checked on the remaining candidates.
+
+    The posting lists are built in one vectorized pass and stored as sorted
+    NumPy arrays. Texts appended or replaced later get small extra posting
+    lists; postings of the replaced versions are left in place, since every
+    candidate is checked against its current text anyway.
+    """
+
+    def __init__(self, texts: Iterable[str] = ()) -> None:
+        """Builds the index.
+
+        Args:
+            texts: Texts to index; their positions are the ids returned by ``search``.
+        """
+        self._texts: List[str] = [normalize_search_key(text) for text in texts]
+        self._keys, self._offsets, self._ids = self._build_postings(self._texts)
+        self._extra_postings: DefaultDict[int, List[int]] = defaultdict(list)
+
+    def __len__(self) -> int:
+        """Returns the number of indexed texts."""
+        return len(self._texts)
+
+    def append(self, text: str) -> None:
+        """Adds a text with the next free id.
+
+        Args:
+            text: Text to index.
+        """
+        self._texts.append(normalize_search_key(text))
+        self._add_extra_postings(len(self._texts) - 1)
+
+    def replace(self, text_id: int, text: str) -> None:
+        """Replaces the text stored under an id.
+
+        Args:
+            text_id: Id of the text.
+            text: New text.
+        """
+        self._texts[text_id] = normalize_search_key(text)
+        self._add_extra_postings(text_id)
+
+    def search(self, query: str) -> Optional[List[int]]:
+        """Finds the texts that contain every word of a query.
+
+        Args:
+            query: Words separated by whitespace.
+
+        Returns:
+            Ids of the matching texts in ascending order, or ``None`` if the
+            query has no words and therefore matches everything.
+        """
+        words = normalize_search_key(query).split()
+        if not words:
+            return None
+
+        postings = [self._get_postings(key) for word in set(words) for key in self._get_ngram_keys(word)]
+        candidates: Optional[np.ndarray] = None
+        for word_postings in sorted(postings, key=len):
+            if candidates is None:
+                candidates = word_postings
+            else:
+                candidates = np.intersect1d(candidates, word_postings, assume_unique=True)
+            if not len(candidates):
+                return []
+
+        texts = self._texts
+        text_ids = range(len(texts)) if candidates is None else candidates.tolist()
+        return [text_id for text_id in text_ids if all(word in texts[text_id] for word in words)]
+
+    def _get_postings(self, key: int) -> np.ndarray:
+        """Returns the sorted ids of the texts that contain a trigram."""
+        position = np.searchsorted(self._keys, key)
+        if position < len(self._keys) and self._keys[position] == key:
+            ids = self._ids[self._offsets[position]:self._offsets[position + 1]]
+        else:
+            ids = np.empty(0, dtype=np.int64)
+
+        extra_ids = self._extra_postings.get(key)
+        if extra_ids:
+            ids = np.union1d(ids, extra_ids)
+        return ids
+
+    def _add_extra_postings(self, text_id: int) -> None:
+        """Records the trigrams of a text added after the index was built."""
+        for key in self._get_ngram_keys(self._texts[text_id]):
+            self._extra_postings[key].append(text_id)
+
+    @staticmethod
+    def _get_ngram_keys(text: str) -> List[int]:
+        """Encodes the distinct trigrams of a text as integers.
+
+        Each character takes 21 bits, enough for any Unicode code point.
+        """
+        return list(
+            {
+                (ord(text[index]) << 42) | (ord(text[index + 1]) << 21) | ord(text[index + 2])
+                for index in range(len(text) - NGRAM_SIZE + 1)
+            }
+        )
+
+    @staticmethod
+    def _build_postings(texts: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Builds the posting lists of all texts at once.
+
+        Args:
+            texts: Normalized texts.
+
+        Returns:
+            Sorted distinct trigram keys, offsets of their posting lists and
+            the concatenated posting lists.
+        """
+        if not texts:
+            return np.empty(0, dtype=np.uint64), np.zeros(1, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+        joined = TEXT_SEPARATOR.join(texts) + TEXT_SEPARATOR
+        codes = np.frombuffer(joined.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+        lengths = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts))
+        text_ids = np.repeat(np.arange(len(texts), dtype=np.int64), lengths + 1)
+
+        separator = ord(TEXT_SEPARATOR)
+        is_inside_text = (codes[1:-1] != separator) & (codes[2:] != separator) & (codes[:-2] != separator)
+        keys = ((codes[:-2] << 42) | (codes[1:-1] << 21) | codes[2:])[is_inside_text]
+        ids = text_ids[:-2][is_inside_text]
+
+        order = np.lexsort((ids, keys))
+        keys, ids = keys[order], ids[order]
+        is_first = np.ones(len(keys), dtype=bool)
+        is_first[1:] = (keys[1:] != keys[:-1]) | (ids[1:] != ids[:-1])
+        keys, ids = keys[is_first], ids[is_first]
+
+        unique_keys, starts = np.unique(keys, return_index=True)
+        offsets = np.append(starts, len(keys)).astype(np.int64)
+        return unique_keys, offsets, ids
+
+
+def compact_search_key(text: str) -> str:
+    """Returns the normalized text with everything but letters and digits removed.
+
+    Fuzzy matching compares compact keys, so "БКН012" and "БКН.0.12" look alike.
+
+    Args:
+        text: Display text or a search query.
+
+    Returns:
+        The compact key.
+    """
+    return "".join(char for char in normalize_search_key(text) if char.isalnum())
+
+
+class FuzzyIndex:
+    """Ranks texts by their similarity to a query, tolerating typos.
+
+    Candidates are the texts that share trigrams with the query; their
+    trigram similarity is computed for all of them at once from the posting
+    lists. The best of them are then scored in full, and only the ``top_k``
+    best texts are kept in a bounded heap. The full score combines:
+
+    * trigram similarity (Jaccard) of the compact keys;
+    * the edit distance from the query to the closest part of the text;
+    * a bonus if the text or one of its words starts with the query;
+    * a small penalty per level of nesting, so shallow paths rank first.
+    """
+
+    def __init__(self, texts: Sequence[str], depths: Optional[Sequence[int]] = None) -> None:
+        """Builds the index.
+
+        Args:
+            texts: Texts to index; their positions are the ids returned by ``search``.
+            depths: Nesting level of each text, such as the number of path segments.
+        """
+        self._texts: List[str] = [normalize_search_key(text) for text in texts]
+        self._compact_texts: List[str] = [compact_search_key(text) for text in self._texts]
+        self._depths = np.zeros(len(texts)) if depths is None else np.asarray(depths, dtype=float)
+        self._keys, self._offsets, self._ids = NgramIndex._build_postings(self._compact_texts)
+        self._ngram_counts = np.bincount(self._ids, minlength=len(self._texts))
+
+    def __len__(self) -> int:
+        """Returns the number of indexed texts."""
+        return len(self._texts)
+
+    def search(self, query: str, top_k: int) -> List[int]:
+        """Finds the texts most similar to a query.
+
+        Args:
+            query: Search query.
+            top_k: Maximum number of results.
+
+        Returns:
+            Ids of the best matching texts, best first.
+        """
+        compact_query = compact_search_key(query)
+        if not compact_query or top_k < 1:
+            return []
+
+        query_keys = NgramIndex._get_ngram_keys(compact_query)
+        if query_keys:
+            candidates, similarities = self._get_trigram_similarities(query_keys)
+        else:
+            # Too short for trigrams; fall back to a plain substring test
+            candidates = np.array(
+                [text_id for text_id, text in enumerate(self._compact_texts) if compact_query in text],
+                dtype=np.int64,
+            )
+            similarities = np.ones(len(candidates))
+        if not len(candidates):
+            return []
+
+        # Only the candidates with the highest trigram similarity are scored in full
+        preselected_count = min(len(candidates), max(top_k * PRESELECTION_FACTOR, MIN_PRESELECTED))
+        if preselected_count < len(candidates):
+            preselected = np.argpartition(-similarities, preselected_count - 1)[:preselected_count]
+            candidates, similarities = candidates[preselected], similarities[preselected]
+
+        query_words = normalize_search_key(query).split()
+        scored = (
+            (self._score(text_id, compact_query, query_words, similarity), -text_id)
+            for text_id, similarity in zip(candidates.tolist(), similarities.tolist())
+        )
+        return [-negative_id for _, negative_id in heapq.nlargest(top_k, scored)]
+
+    def _get_trigram_similarities(self, query_keys: List[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """Computes the Jaccard similarity of the query trigrams with every candidate text.
+
+        Args:
+            query_keys: Encoded distinct trigrams of the compact query.
+
+        Returns:
+            Ids of the texts sharing at least one trigram with the query and
+            their similarities.
+        """
+        postings = []
+        for key in query_keys:
+            position = np.searchsorted(self._keys, key)
+            if position < len(self._keys) and self._keys[position] == key:
+                postings.append(self._ids[self._offsets[position]:self._offsets[position + 1]])
+        if not postings:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        shared_counts = np.bincount(np.concatenate(postings), minlength=len(self._texts))
+        candidates = np.flatnonzero(shared_counts)
+        shared = shared_counts[candidates]
+        similarities = shared / (len(query_keys) + self._ngram_counts[candidates] - shared)
+        return candidates, similarities
+
+    def _score(self, text_id: int, compact_query: str, query_words: List[str], similarity: float) -> float:
+        """Computes the full score of a candidate text.
+
+        Args:
+            text_id: Id of the text.
+            compact_query: Compact key of the query.
+            query_words: Normalized words of the query.
+            similarity: Trigram similarity of the text and the query.
+
+        Returns:
+            The score; higher is better.
+        """
+        compact_text = self._compact_texts[text_id]
+        distance = _substring_edit_distance(compact_query, compact_text)
+        score = SIMILARITY_WEIGHT * similarity + EDIT_WEIGHT * (1 - distance / len(compact_query))
+
+        if compact_text.startswith(compact_query):
+            score += PREFIX_BONUS
+        elif query_words and any(word.startswith(query_words[0]) for word in self._texts[text_id].split()):
+            score += WORD_PREFIX_BONUS
+        return score - DEPTH_PENALTY * self._depths[text_id]
+
+
+def _substring_edit_distance(pattern: str, text: str) -> int:
+    """Returns the fewest edits that turn the pattern into some substring of the text.
+
+    Args:
+        pattern: Searched string.
+        text: String searched in.
+
+    Returns:
+        The edit distance, at most ``len(pattern)``.
+    """
+    previous = [0] * (len(text) + 1)
+    for row, pattern_char in enumerate(pattern, start=1):
+        current = [row]
+        for column, text_char in enumerate(text, start=1):
+            current.append(
+                min(
+                    previous[column] + 1,
+                    current[column - 1] + 1,
+                    previous[column - 1] + (pattern_char != text_char),
+                )
+            )
+        previous = current
+    return min(previous)
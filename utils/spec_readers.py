@@ -0,0 +1,423 @@
+import os
+import posixpath
+import zipfile
+from typing import IO, Callable, Dict, Iterator, List, Sequence, Tuple
+from xml.etree import ElementTree
+
+import pandas as pd
+from openpyxl import load_workbook
+
+try:
+    from python_calamine import CalamineWorkbook
+except ImportError:  # Optional faster engine
+    CalamineWorkbook = None
+
+# Column keys in the source Excel files
+NOM_KEY = "Номенклатура"
+QTY_KEY = "Количество"
+UNIT_KEY = "Ед. изм."
+
+SPEC_SHEET_NAME = "TDSheet"
+DEFAULT_SPEC_READER = "openpyxl"
+
+# A single normalized specification row:
+# (nomenclature, quantity, unit, is_rmp)
+SpecRow = Tuple[str, float, str, bool]
+
+# Version of the normalized rows; bump it whenever any reader starts
+# returning different rows for the same file, so cached rows are parsed again
+SPEC_ROW_FORMAT_VERSION = 2
+
+# Material columns of a single sheet row: (nomenclature, quantity, unit)
+MaterialRow = Tuple[str, float, str]
+
+# A reader backend streams the material columns of the TDSheet of a file
+SpecReader = Callable[[str], Iterator[MaterialRow]]
+
+# Registered reader backends, selectable with ``spec_reader_backend`` in config.yaml
+SPEC_READERS: Dict[str, SpecReader] = {}
+
+
+def register_spec_reader(name: str, reader: SpecReader) -> None:
+    """Makes a reader backend available under a name.
+
+    Args:
+        name: Backend name used in config.yaml and the benchmark.
+        reader: Function that yields (nomenclature, quantity, unit) rows.
+    """
+    SPEC_READERS[name] = reader
+
+
+def is_rmp_file(file_path: str) -> bool:
+    """Checks whether a specification file lives inside an RMP subfolder.
+
+    Args:
+        file_path: Path to a specification workbook.
+
+    Returns:
+        True if the parent folder is named "РМП" (case-insensitive).
+    """
+    return os.path.basename(os.path.dirname(file_path)).lower() == "рмп"
+
+
+def read_specification(file_path: str, backend: str = DEFAULT_SPEC_READER) -> List[SpecRow]:
+    """Reads the TDSheet of a workbook into normalized rows.
+
+    Legacy ``.xls`` files are always read with pandas, since neither
+    openpyxl nor the XML backend can open them. This function is
+    self-contained so that it can be executed in a worker process of a
+    ``ProcessPoolExecutor``.
+
+    Args:
+        file_path: Path to a specification workbook.
+        backend: Name of a registered reader backend.
+
+    Returns:
+        Rows of (nomenclature, quantity, unit, is_rmp) in file order.
+
+    Raises:
+        ValueError: If the backend is unknown.
+    """
+    if file_path.lower().endswith(".xls"):
+        backend = "pandas"
+    if backend not in SPEC_READERS:
+        raise ValueError(f"Unknown specification reader: {backend}")
+
+    is_rmp = is_rmp_file(file_path)
+    return [
+        (nomenclature, quantity, unit, is_rmp)
+        for nomenclature, quantity, unit in SPEC_READERS[backend](file_path)
+    ]
+
+
+def iter_rows_pandas(file_path: str) -> Iterator[MaterialRow]:
+    """Reads the material columns of the TDSheet using ``pandas.read_excel``.
+
+    Args:
+        file_path: Path to a specification workbook.
+
+    Yields:
+        Tuples of (nomenclature, quantity, unit).
+    """
+    # Cells such as "NA" are names, not missing values, as for the other readers
+    df = pd.read_excel(file_path, sheet_name=SPEC_SHEET_NAME, keep_default_na=False)
+    df = normalize_material_columns(df)
+    df = df[df[NOM_KEY] != ""]  # Empty cells are read as "" and skipped, as by the other readers
+
+    for nomenclature, quantity, unit in zip(df[NOM_KEY], df[QTY_KEY], df[UNIT_KEY]):
+        yield str(nomenclature), float(quantity), str(unit)
+
+
+def iter_rows_openpyxl(file_path: str) -> Iterator[MaterialRow]:
+    """Streams the material columns of the TDSheet of an ``.xlsx`` workbook.
+
+    The workbook is opened in read-only mode, the header row is located
+    once, and only the nomenclature, quantity and unit cells of each row are
+    produced. Rows without a nomenclature are skipped.
+
+    Args:
+        file_path: Path to a specification workbook.
+
+    Yields:
+        Tuples of (nomenclature, quantity, unit).
+
+    Raises:
+        ValueError: If the sheet or required columns cannot be located.
+    """
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        if SPEC_SHEET_NAME not in workbook.sheetnames:
+            raise ValueError(f"Worksheet named '{SPEC_SHEET_NAME}' not found")
+
+        sheet = workbook[SPEC_SHEET_NAME]
+        # Exported files often declare a wrong sheet size; read every stored cell instead
+        sheet.reset_dimensions()
+        yield from _iter_material_rows(sheet.iter_rows(values_only=True))
+    finally:
+        workbook.close()
+
+
+def iter_rows_xml(file_path: str) -> Iterator[MaterialRow]:
+    """Streams the material columns of the TDSheet straight from the .xlsx XML.
+
+    The workbook archive is opened directly: TDSheet is resolved through
+    ``workbook.xml`` and its relationships, shared strings are loaded once,
+    and the sheet XML is parsed incrementally. Styles are never read, so
+    date-formatted cells are returned as their serial numbers.
+
+    Args:
+        file_path: Path to a specification workbook.
+
+    Yields:
+        Tuples of (nomenclature, quantity, unit).
+
+    Raises:
+        ValueError: If the sheet or required columns cannot be located.
+    """
+    with zipfile.ZipFile(file_path) as archive:
+        sheet_path = _resolve_sheet_path(archive, SPEC_SHEET_NAME)
+        shared_strings = _load_shared_strings(archive)
+        with archive.open(sheet_path) as sheet_file:
+            yield from _iter_material_rows(_iter_sheet_xml_rows(sheet_file, shared_strings))
+
+
+def find_material_columns(header: Sequence) -> Dict[str, int]:
+    """Locates material columns in a header row using substring matching.
+
+    Args:
+        header: Header cell values in column order.
+
+    Returns:
+        Mapping of each standard key to the position of its column.
+
+    Raises:
+        ValueError: If required columns cannot be located.
+    """
+    headers_lower = [str(value).lower() for value in header]
+    candidates = {
+        NOM_KEY: ["номенк"],
+        QTY_KEY: ["кол"],
+        UNIT_KEY: ["ед", "изм"],
+    }
+
+    positions: Dict[str, int] = {}
+    for target, substrings in candidates.items():
+        for position, low in enumerate(headers_lower):
+            if all(sub in low for sub in substrings):
+                positions[target] = position
+                break
+
+    missing = [key for key in (NOM_KEY, QTY_KEY, UNIT_KEY) if key not in positions]
+    if missing:
+        raise ValueError(f"Usecols do not match columns, missing: {missing}, got: {list(header)}")
+
+    return positions
+
+
+def iter_rows_calamine(file_path: str) -> Iterator[MaterialRow]:
+    """Reads the material columns of the TDSheet with the Rust-based calamine engine.
+
+    Requires the optional ``python-calamine`` package.
+
+    Args:
+        file_path: Path to a specification workbook.
+
+    Yields:
+        Tuples of (nomenclature, quantity, unit).
+
+    Raises:
+        ValueError: If the sheet or required columns cannot be located.
+    """
+    workbook = CalamineWorkbook.from_path(file_path)
+    if SPEC_SHEET_NAME not in workbook.sheet_names:
+        raise ValueError(f"Worksheet named '{SPEC_SHEET_NAME}' not found")
+
+    sheet_rows = workbook.get_sheet_by_name(SPEC_SHEET_NAME).to_python(skip_empty_area=False)
+    yield from _iter_material_rows(
+        # calamine reports empty cells as "" and every number as float
+        [
+            None if value == "" else int(value) if isinstance(value, float) and value.is_integer() else value
+            for value in row
+        ]
+        for row in sheet_rows
+    )
+
+
+def _iter_material_rows(rows: Iterator[Sequence]) -> Iterator[MaterialRow]:
+    """Extracts material columns from raw sheet rows, starting at the header.
+
+    Args:
+        rows: Cell values of each sheet row, in order.
+
+    Yields:
+        Tuples of (nomenclature, quantity, unit) for rows with a nomenclature.
+
+    Raises:
+        ValueError: If required columns cannot be located.
+    """
+    header = next((row for row in rows if any(value is not None for value in row)), ())
+    columns = find_material_columns(header)
+    nom_idx, qty_idx, unit_idx = columns[NOM_KEY], columns[QTY_KEY], columns[UNIT_KEY]
+    width = max(nom_idx, qty_idx, unit_idx) + 1
+
+    for row in rows:
+        if len(row) < width:
+            row = tuple(row) + (None,) * (width - len(row))
+
+        nomenclature = row[nom_idx]
+        if nomenclature is None:
+            continue
+
+        quantity = row[qty_idx]
+        unit = row[unit_idx]
+        yield (
+            str(nomenclature),
+            float("" if quantity is None else quantity),
+            "" if unit is None else str(unit),
+        )
+
+
+def _local_name(tag: str) -> str:
+    """Strips the XML namespace from an element tag."""
+    return tag.rsplit("}", 1)[-1]
+
+
+def _resolve_sheet_path(archive: zipfile.ZipFile, sheet_name: str) -> str:
+    """Finds the archive member holding the XML of a named worksheet.
+
+    Args:
+        archive: Opened .xlsx archive.
+        sheet_name: Name of the worksheet as shown in Excel.
+
+    Returns:
+        Path of the worksheet XML inside the archive.
+
+    Raises:
+        ValueError: If the workbook has no worksheet with this name.
+    """
+    relation_id = None
+    workbook = ElementTree.fromstring(archive.read("xl/workbook.xml"))
+    for element in workbook.iter():
+        if _local_name(element.tag) == "sheet" and element.get("name") == sheet_name:
+            relation_id = next(
+                (value for key, value in element.attrib.items() if _local_name(key) == "id"), None
+            )
+            break
+    if relation_id is None:
+        raise ValueError(f"Worksheet named '{sheet_name}' not found")
+
+    relations = ElementTree.fromstring(archive.read("xl/_rels/workbook.xml.rels"))
+    for element in relations.iter():
+        if _local_name(element.tag) == "Relationship" and element.get("Id") == relation_id:
+            target = element.get("Target", "")
+            if target.startswith("/"):
+                return target.lstrip("/")
+            return posixpath.normpath(posixpath.join("xl", target))
+
+    raise ValueError(f"Worksheet named '{sheet_name}' not found")
+
+
+def _load_shared_strings(archive: zipfile.ZipFile) -> List[str]:
+    """Loads the shared strings table of a workbook.
+
+    Args:
+        archive: Opened .xlsx archive.
+
+    Returns:
+        Shared strings in index order; empty if the workbook has none.
+    """
+    if "xl/sharedStrings.xml" not in archive.namelist():
+        return []
+
+    strings: List[str] = []
+    with archive.open("xl/sharedStrings.xml") as strings_file:
+        for _, element in ElementTree.iterparse(strings_file):
+            if _local_name(element.tag) != "si":
+                continue
+            parts: List[str] = []
+            for child in element:
+                # Phonetic runs (rPh) are annotations, not part of the cell text
+                if _local_name(child.tag) == "t":
+                    parts.append(child.text or "")
+                elif _local_name(child.tag) == "r":
+                    parts.extend(
+                        text.text or "" for text in child if _local_name(text.tag) == "t"
+                    )
+            strings.append("".join(parts))
+            element.clear()
+    return strings
+
+
+def _iter_sheet_xml_rows(sheet_file: IO[bytes], shared_strings: List[str]) -> Iterator[List]:
+    """Parses worksheet XML into lists of cell values, one list per row.
+
+    Args:
+        sheet_file: Stream with the worksheet XML.
+        shared_strings: Shared strings table of the workbook.
+
+    Yields:
+        Cell values of each row; missing cells are ``None``.
+    """
+    for _, element in ElementTree.iterparse(sheet_file):
+        if _local_name(element.tag) != "row":
+            continue
+
+        values: List = []
+        for cell in element:
+            if _local_name(cell.tag) != "c":
+                continue
+
+            reference = cell.get("r")
+            position = _column_index(reference) if reference else len(values)
+            if position > len(values):
+                values.extend([None] * (position - len(values)))
+            values.append(_cell_value(cell, shared_strings))
+
+        element.clear()
+        yield values
+
+
+def _column_index(reference: str) -> int:
+    """Converts a cell reference such as ``"AB12"`` to a zero-based column index."""
+    index = 0
+    for char in reference:
+        if not char.isalpha():
+            break
+        index = index * 26 + (ord(char.upper()) - ord("A") + 1)
+    return index - 1
+
+
+def _cell_value(cell: ElementTree.Element, shared_strings: List[str]):
+    """Decodes the value of a ``<c>`` element without consulting styles.
+
+    Args:
+        cell: Worksheet cell element.
+        shared_strings: Shared strings table of the workbook.
+
+    Returns:
+        The cell value as ``str``, ``int``, ``float`` or ``bool``, or ``None``.
+    """
+    cell_type = cell.get("t", "n")
+    raw = None
+    for child in cell:
+        name = _local_name(child.tag)
+        if name == "v":
+            raw = child.text
+        elif name == "is" and cell_type == "inlineStr":
+            return "".join(text.text or "" for text in child.iter() if _local_name(text.tag) == "t")
+
+    if raw is None:
+        return None
+    if cell_type == "s":
+        return shared_strings[int(raw)]
+    if cell_type == "b":
+        return raw == "1"
+    if cell_type in ("str", "e", "inlineStr"):
+        return raw
+    if any(char in raw for char in ".eE"):
+        return float(raw)
+    return int(raw)
+
+
+def normalize_material_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Renames material columns to standard keys using substring matching.
+
+    Args:
+        df: Raw DataFrame read from a materials workbook.
+
+    Returns:
+        DataFrame with normalized column names.
+
+    Raises:
+        ValueError: If required columns cannot be located.
+    """
+    positions = find_material_columns(list(df.columns))
+    mapping = {df.columns[position]: target for target, position in positions.items()}
+    return df.rename(columns=mapping)
+
+
+register_spec_reader("openpyxl", iter_rows_openpyxl)
+register_spec_reader("xml", iter_rows_xml)
+register_spec_reader("pandas", iter_rows_pandas)
+if CalamineWorkbook is not None:
+    register_spec_reader("calamine", iter_rows_calamine)
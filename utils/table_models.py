@@ -0,0 +1,156 @@
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, QObject, Qt, pyqtSignal
+
+# Column keys in the source Excel files
+NOM_KEY = "Номенклатура"
+QTY_KEY = "Количество"
+UNIT_KEY = "Ед. изм."
+
+# Column with the selection checkboxes
+CHECK_COLUMN = 0
+
+
+class MaterialsTableModel(QAbstractTableModel):
+    """Serves the materials of a product to the materials table.
+
+    The first column holds the selection checkboxes through
+    ``Qt.CheckStateRole``; the other columns show the nomenclature, the
+    quantity and the unit. No widgets are created per row: the view asks
+    only for the cells it paints, so replacing the materials is a single
+    model reset regardless of their number. Check states are read from the
+    owner's selection array through the position of each row's material in
+    it; rows without a position are shown unchecked and cannot be checked.
+    The number of checked rows is counted once per reset and then kept
+    up to date on every toggle, so the header checkbox and the buttons
+    never rescan the rows.
+
+    Attributes:
+        check_state_changed: Signal with (material name, is checked) emitted
+            when the user toggles a row checkbox.
+    """
+
+    check_state_changed = pyqtSignal(str, bool)
+
+    def __init__(self, parent: Optional[QObject] = None) -> None:
+        """Initializes an empty model.
+
+        Args:
+            parent: Parent Qt object.
+        """
+        super().__init__(parent)
+        self._headers: List[str] = ["", NOM_KEY, QTY_KEY, UNIT_KEY]
+        self._materials: List[Dict] = []
+        self._selection: np.ndarray = np.ones(0, dtype=bool)
+        self._selection_indices: np.ndarray = np.empty(0, dtype=np.int64)
+        self._checked_count: int = 0
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        """Returns the number of materials."""
+        return 0 if parent.isValid() else len(self._materials)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        """Returns the number of columns."""
+        return 0 if parent.isValid() else len(self._headers)
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.DisplayRole) -> Any:
+        """Returns the column titles; rows are numbered from one."""
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self._headers[section] if 0 <= section < len(self._headers) else None
+        return section + 1
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole) -> Any:
+        """Returns the check state of the first column and the text of the others."""
+        if not index.isValid() or not 0 <= index.row() < len(self._materials):
+            return None
+
+        item = self._materials[index.row()]
+        column = index.column()
+        if column == CHECK_COLUMN:
+            if role == Qt.CheckStateRole:
+                return Qt.Checked if self._is_checked(index.row()) else Qt.Unchecked
+            return None
+
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            key = self._headers[column]
+            return str(item.get(key, "")) if key == QTY_KEY else item.get(key, "")
+        return None
+
+    def setData(self, index: QModelIndex, value: Any, role: int = Qt.EditRole) -> bool:
+        """Toggles the checkbox of a row and reports it through ``check_state_changed``."""
+        if not index.isValid() or index.column() != CHECK_COLUMN or role != Qt.CheckStateRole:
+            return False
+
+        if self._selection_indices[index.row()] < 0:
+            return False
+
+        is_checked = value == Qt.Checked
+        if self._is_checked(index.row()) == is_checked:
+            return True
+
+        # The counter is updated first, so handlers of the signal already see it
+        self._checked_count += 1 if is_checked else -1
+        self.check_state_changed.emit(self.material_name(index.row()), is_checked)
+        self.dataChanged.emit(index, index, [Qt.CheckStateRole])
+        return True
+
+    def flags(self, index: QModelIndex) -> Qt.ItemFlags:
+        """Makes only the first column checkable."""
+        if not index.isValid():
+            return Qt.NoItemFlags
+        if index.column() == CHECK_COLUMN:
+            if self._selection_indices[index.row()] < 0:
+                return Qt.ItemIsEnabled
+            return Qt.ItemIsEnabled | Qt.ItemIsUserCheckable
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    def set_materials(self, materials: List[Dict], selection: np.ndarray, selection_indices: np.ndarray) -> None:
+        """Replaces the displayed materials.
+
+        Args:
+            materials: Rows to display.
+            selection: Selection flags of all materials of the product; the
+                model reads them on demand, so the owner updates them in place.
+            selection_indices: Position of every row's material in ``selection``,
+                or -1 for rows that are not in it.
+        """
+        self.beginResetModel()
+        self._materials = materials
+        self._selection = selection
+        self._selection_indices = selection_indices
+        self._checked_count = self._count_checked()
+        self.endResetModel()
+
+    def refresh_check_states(self) -> None:
+        """Recounts and repaints the checkboxes after the owner changed many flags at once.
+
+        Only the checkbox column is reported as changed.
+        """
+        if not self._materials:
+            return
+
+        self._checked_count = self._count_checked()
+        last_row = len(self._materials) - 1
+        self.dataChanged.emit(self.index(0, CHECK_COLUMN), self.index(last_row, CHECK_COLUMN), [Qt.CheckStateRole])
+
+    @property
+    def checked_count(self) -> int:
+        """Number of displayed rows whose checkbox is checked."""
+        return self._checked_count
+
+    def material_name(self, row: int) -> str:
+        """Returns the nomenclature shown in a row."""
+        return self._materials[row].get(NOM_KEY, "")
+
+    def _is_checked(self, row: int) -> bool:
+        """Checks whether the checkbox of a row is checked."""
+        selection_index = self._selection_indices[row]
+        return selection_index >= 0 and bool(self._selection[selection_index])
+
+    def _count_checked(self) -> int:
+        """Counts the checked rows; rows without a position in the selection are skipped."""
+        indices = self._selection_indices
+        return int(np.count_nonzero(self._selection[indices[indices >= 0]]))